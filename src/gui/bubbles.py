@@ -1168,13 +1168,13 @@ class MessageBubble(QTextEdit):
             if self.bubble_id in self.branch_entry:
                 return
             else:
-                self.main.page_chat.workflow.deactivate_all_branches_with_msg(self.bubble_id)
                 current_index = self.child_branches.index(self.bubble_id)
                 if current_index == 0:
+                    self.main.page_chat.workflow.deactivate_all_branches_with_msg(self.bubble_id)
                     self.reload_following_bubbles()
                     return
                 next_msg_id = self.child_branches[current_index - 1]
-                self.main.page_chat.workflow.activate_branch_with_msg(next_msg_id)
+                self.main.page_chat.workflow.switch_branch_with_msg(self.bubble_id, next_msg_id)
 
             self.reload_following_bubbles()
 
@@ -1187,9 +1187,8 @@ class MessageBubble(QTextEdit):
                 current_index = self.child_branches.index(self.bubble_id)
                 if current_index == len(self.child_branches) - 1:
                     return
-                self.main.page_chat.workflow.deactivate_all_branches_with_msg(self.bubble_id)
                 next_msg_id = self.child_branches[current_index + 1]
-                self.main.page_chat.workflow.activate_branch_with_msg(next_msg_id)
+                self.main.page_chat.workflow.switch_branch_with_msg(self.bubble_id, next_msg_id)
 
             self.reload_following_bubbles()
 
@@ -23,6 +23,7 @@ class Member:
 
         self.last_output: Optional[str] = None
         self.turn_output: Optional[str] = None
+        self._full_member_id: Optional[str] = None
 
         self.default_role_key: str = 'group.output_role'
         self.receivable_function = None
@@ -52,6 +53,9 @@ class Member:
     def full_member_id(self):
         # bubble up to the top level workflow collecting member ids, return as a string joined with "." and reversed
         # where self._parent_workflow is None, that's the top level workflow
+        # the nesting of a member doesn't change once loaded, so the result is cached
+        if self._full_member_id is not None:
+            return self._full_member_id
         id_list = [self.member_id]
         parent = self.workflow  #_parent_workflow
         while parent:
@@ -59,7 +63,8 @@ class Member:
                 break
             id_list.append(parent.member_id)
             parent = parent.workflow
-        return '.'.join(map(str, reversed(id_list)))
+        self._full_member_id = '.'.join(map(str, reversed(id_list)))
+        return self._full_member_id
 
     @abstractmethod
     async def run_member(self):
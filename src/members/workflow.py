@@ -1,9 +1,12 @@
 import asyncio
+import heapq
 import json
 import sqlite3
 import uuid
-from functools import partial
-from typing import Optional, Dict, Tuple, List, Any
+from functools import partial, lru_cache
+from itertools import groupby
+from operator import itemgetter
+from typing import Optional, Dict, Tuple, List, Any, Set
 
 from src.members.base import Member
 from src.members.agent import Agent
@@ -19,18 +22,42 @@ from PySide6.QtGui import Qt, QPen, QColor, QBrush, QPainter, QPainterPath, QCur
     QPainterPathStroker, QPolygonF, QLinearGradient
 from PySide6.QtWidgets import QWidget, QGraphicsScene, QGraphicsEllipseItem, QGraphicsItem, QGraphicsView, \
     QMessageBox, QGraphicsPathItem, QStackedLayout, QMenu, QInputDialog, QGraphicsWidget, \
-    QSizePolicy, QApplication, QFrame, QTreeWidgetItem, QSplitter, QVBoxLayout
+    QSizePolicy, QApplication, QFrame, QTreeWidgetItem, QSplitter, QVBoxLayout, QGraphicsColorizeEffect
 
 from src.gui.config import ConfigWidget, CVBoxLayout, CHBoxLayout, ConfigFields, IconButtonCollection, \
     ConfigJsonTree, ConfigJoined
 
 from src.gui.widgets import IconButton, ToggleIconButton, TreeDialog, BaseTreeWidget, find_main_widget
-from src.utils.helpers import path_to_pixmap, display_messagebox, get_avatar_paths_from_config, \
-    merge_config_into_workflow_config, get_member_name_from_config, block_signals
+from src.gui import style
+from src.utils.helpers import path_to_pixmap, apply_alpha_to_hex, display_messagebox, get_avatar_paths_from_config, \
+    merge_config_into_workflow_config, get_member_name_from_config, block_signals, suspend_scene_index
 
 loop = asyncio.new_event_loop()
 asyncio.set_event_loop(loop)
 
+ALL_MEMBER_TYPES = ('agent', 'workflow', 'user', 'tool', 'block', 'node')
+
+
+def _paths_to_key(paths):
+    return tuple(_paths_to_key(p) for p in paths) if isinstance(paths, list) else paths
+
+
+def _key_to_paths(key):
+    return [_key_to_paths(p) for p in key] if isinstance(key, tuple) else key
+
+
+@lru_cache(maxsize=256)
+def _avatar_brush(paths_key, opacity, diameter, text_color):  # text_color keys the colorized default avatars
+    pixmap = path_to_pixmap(_key_to_paths(paths_key), opacity=opacity, diameter=diameter)
+    if not pixmap:
+        return None
+    return QBrush(pixmap.scaled(diameter, diameter))
+
+
+def avatar_brush(avatar_paths, opacity=1, diameter=50):
+    """Returns the brush for the avatar paths, shared between members with the same avatars"""
+    return _avatar_brush(_paths_to_key(avatar_paths), opacity, diameter, style.TEXT_COLOR)
+
 
 class Workflow(Member):
     def __init__(self, **kwargs):
@@ -38,6 +65,7 @@ class Workflow(Member):
         from src.system.base import manager
 
         self._parent_workflow = kwargs.get('workflow', None)
+        self._root: Workflow = self if self._parent_workflow is None else self._parent_workflow._root
         self.system = manager
         self.member_type: str = 'workflow'
         self.config: Dict[str, Any] = kwargs.get('config', {})
@@ -63,16 +91,20 @@ class Workflow(Member):
             get_latest = kwargs.get('get_latest', False)
             kind = kwargs.get('kind', 'CHAT')  # throwaway for now, need to try to keep it that way
 
+            config_str = None
             if get_latest and self.context_id is not None:
                 print("Warning: get_latest and context_id are both set, get_latest will be ignored.")  # todo warnings
             if get_latest and self.context_id is None:
-                # Load latest context
-                self.context_id = sql.get_scalar("SELECT id FROM contexts WHERE parent_id IS NULL AND kind = ? ORDER BY id DESC LIMIT 1",
-                                                 (kind,))
+                # Load latest context, along with its config in the same query
+                latest_context = sql.get_scalar("SELECT id, config FROM contexts WHERE parent_id IS NULL AND kind = ? ORDER BY id DESC LIMIT 1",
+                                                (kind,), return_type='tuple')
+                if latest_context:
+                    self.context_id, config_str = latest_context
             if self.context_id is not None:
                 if self.config:
                     print("Warning: config is set, but will be ignored because an existing workflow is being loaded.")  # todo warnings
-                config_str = sql.get_scalar("SELECT config FROM contexts WHERE id = ?", (self.context_id,))
+                if config_str is None:
+                    config_str = sql.get_scalar("SELECT config FROM contexts WHERE id = ?", (self.context_id,))
                 self.config = json.loads(config_str) or {}
 
             else:
@@ -84,45 +116,50 @@ class Workflow(Member):
                 if not self.config:
                     init_member_config = {'_TYPE': kind_init_members[kind]}
                     self.config = merge_config_into_workflow_config(init_member_config)
-                sql.execute("INSERT INTO contexts (kind, config, name) VALUES (?, ?, ?)", (kind, json.dumps(self.config), self.chat_title))
-                self.context_id = sql.get_scalar("SELECT id FROM contexts WHERE kind = ? ORDER BY id DESC LIMIT 1", (kind,))
+                self.context_id = sql.execute("INSERT INTO contexts (kind, config, name) VALUES (?, ?, ?)",
+                                              (kind, json.dumps(self.config), self.chat_title))  # returns lastrowid
 
         self.loop = asyncio.get_event_loop()
         self.responding = False
         self.stop_requested = False
 
         self.members: Dict[str, Member] = {}  # id: member
-        self.boxes: List[set] = []
+        self.boxes: List[frozenset] = []
+        self.member_box_indexes: Dict[str, int] = {}  # member_id: index of its box in self.boxes
+        self.flat_members: Dict[str, Member] = {}  # full_member_id (relative to this workflow): member
+        self.members_cache: Dict[Tuple, List[Member]] = {}  # (incl_types, excl_types): get_members result
+        self.sorted_members_cache: Optional[Tuple[List, List]] = None  # (config members list, sorted by loc_x)
 
         self.autorun = True
         self.behaviour = None
+        self.single_agent_fastpath = False
 
         self.load()
         self.receivable_function = self.behaviour.receive
 
     @property
     def context_id(self) -> int:
-        return self.get_from_root('_context_id')
+        return self._root._context_id
 
     @property
     def chat_name(self) -> str:
-        return self.get_from_root('_chat_name')
+        return self._chat_name
 
     @property
     def chat_title(self) -> str:
-        return self.get_from_root('_chat_title')
+        return self._root._chat_title
 
     @property
     def leaf_id(self) -> int:
-        return self.get_from_root('_leaf_id')
+        return self._root._leaf_id
 
     @property
     def message_history(self) -> MessageHistory:
-        return self.get_from_root('_message_history')
+        return self._root._message_history
 
     @context_id.setter
     def context_id(self, value):
-        self._context_id = value
+        self._root._context_id = value
 
     @chat_name.setter
     def chat_name(self, value):
@@ -130,20 +167,15 @@ class Workflow(Member):
 
     @chat_title.setter
     def chat_title(self, value):
-        self._chat_title = value
+        self._root._chat_title = value
 
     @leaf_id.setter
     def leaf_id(self, value):
-        self._leaf_id = value
+        self._root._leaf_id = value
 
     @message_history.setter
     def message_history(self, value):
-        self._message_history = value
-
-    def get_from_root(self, attr_name) -> Any:
-        if hasattr(self, attr_name):
-            return getattr(self, attr_name, None)
-        return self._parent_workflow.get_from_root(attr_name)
+        self._root._message_history = value
 
     def load_config(self, json_config=None):
         if json_config is None:
@@ -178,41 +210,61 @@ class Workflow(Member):
             members = wf_config.get('members', [])
         inputs = self.config.get('inputs', [])
 
+        # The config is only replaced when edited, so reuse the sorted order while it's the same members list
+        if self.sorted_members_cache is None or self.sorted_members_cache[0] is not members:
+            self.sorted_members_cache = (members, sorted(members, key=lambda x: x['loc_x']))
+        members = self.sorted_members_cache[1]
+        member_indexes = {str(member_dict['id']): i for i, member_dict in enumerate(members)}
+
+        # Index the (non looper) input ids of each member once, instead of filtering `inputs` per member
+        inputs_by_target = {}
+        dependants = {}
+        for input_info in inputs:
+            if input_info['config'].get('looper', False):
+                continue
+            source_member_id = input_info['source_member_id']
+            target_member_id = input_info['target_member_id']
+            if source_member_id not in member_indexes or target_member_id not in member_indexes:
+                continue
+            target_input_ids = inputs_by_target.setdefault(target_member_id, [])
+            if source_member_id in target_input_ids:
+                continue
+            target_input_ids.append(source_member_id)
+            dependants.setdefault(source_member_id, []).append(target_member_id)
+
         last_member_id = None
         last_loc_x = -100
         current_box_member_ids = set()
 
-        members = sorted(members, key=lambda x: x['loc_x'])
+        # Ordering is a topological sort (kahn's algorithm) where ties are broken by loc_x,
+        #   so the lowest loc_x member with all inputs loaded is always next
+        indegrees = {member_id: len(inputs_by_target.get(member_id, [])) for member_id in member_indexes}
+        ready = [i for member_id, i in member_indexes.items() if indegrees[member_id] == 0]
+        heapq.heapify(ready)
 
         self.members = {}  #!looper!#
+        self.members_cache = {}
         self.boxes = []
-        iterable = iter(members)
-        while len(members) > 0:
-            try:
-                member_dict = next(iterable)
-            except StopIteration:  # todo temp make nicer
-                iterable = iter(members)
-                continue
+        while True:
+            if not ready:
+                unloaded_ids = [member_id for member_id in member_indexes if member_id not in self.members]
+                if not unloaded_ids:
+                    break
+                # members in a (non looper) input cycle, or after one, never have all their inputs loaded,
+                #   so load the lowest loc_x of them anyway, then continue in input order from it
+                print(f"Workflow members {unloaded_ids} have circular inputs, loading them by position")
+                member_id = unloaded_ids[0]
+                indegrees[member_id] = 0  # its inputs loading later can't bring it back to 0 and queue it again
+                heapq.heappush(ready, member_indexes[member_id])
+            member_dict = members[heapq.heappop(ready)]
 
             member_id = str(member_dict['id'])
-            if self._parent_workflow:
-                pass
             entity_id = member_dict.get('agent_id', None)
             member_config = member_dict['config']
             loc_x = member_dict.get('loc_x', 50)
             loc_y = member_dict.get('loc_y', 0)
 
-            member_input_ids = [
-                input_info['source_member_id']
-                for input_info in inputs
-                if input_info['target_member_id'] == member_id
-                and not input_info['config'].get('looper', False)
-            ]
-
-            # Order based on the inputs
-            if len(member_input_ids) > 0:
-                if not all((inp_id in self.members) for inp_id in member_input_ids):
-                    continue
+            member_input_ids = inputs_by_target.get(member_id, [])
 
             # Instantiate the member
             member_type = member_dict.get('config', {}).get('_TYPE', 'agent')
@@ -251,28 +303,42 @@ class Workflow(Member):
 
                 else:
                     if current_box_member_ids:
-                        self.boxes.append(current_box_member_ids)
+                        self.boxes.append(frozenset(current_box_member_ids))
                         current_box_member_ids = set()
 
                 last_loc_x = loc_x
                 last_member_id = member_id
 
             self.members[member_id] = member
-            members.remove(member_dict)
-            iterable = iter(members)
+            for dependant_id in dependants.get(member_id, []):
+                indegrees[dependant_id] -= 1
+                if indegrees[dependant_id] == 0:
+                    heapq.heappush(ready, member_indexes[dependant_id])
 
         if current_box_member_ids:
-            self.boxes.append(current_box_member_ids)
+            self.boxes.append(frozenset(current_box_member_ids))
 
         del_boxes = []
         for box in self.boxes:
+            visited = set()  # shared across the box, an input already walked can't reach the box again
             for member_id in box:
-                fnd = self.walk_inputs_recursive(member_id, box)
+                fnd = self.walk_inputs_recursive(member_id, box, visited)
                 if fnd:
                     del_boxes.append(box)
                     break
         for box in del_boxes:
             self.boxes.remove(box)
+        self.member_box_indexes = {member_id: i for i, box in enumerate(self.boxes) for member_id in box}
+
+        self.members_cache = {}  # in case get_members was called while members were loading
+
+        # Nested workflows are loaded above, so their flat_members are already built
+        self.flat_members = {}
+        for member_id, member in self.members.items():
+            self.flat_members[member_id] = member
+            if isinstance(member, Workflow):
+                for nested_id, nested_member in member.flat_members.items():
+                    self.flat_members[f'{member_id}.{nested_id}'] = nested_member
 
         counted_members = self.count_members()
         if counted_members == 1:
@@ -283,27 +349,35 @@ class Workflow(Member):
 
         self.update_behaviour()
 
-    def walk_inputs_recursive(self, member_id: str, search_list: set) -> bool:  #!asyncrecdupe!#
-        member = self.members[member_id]  #!params!#
-        found = False
-        for inp in member.inputs:
-            # is_looper = self..inputs[inp].config.get('looper', False)
-            if inp in search_list:
-                return True
-            found = found or self.walk_inputs_recursive(inp, search_list)
-        return found
+    def walk_inputs_recursive(self, member_id: str, search_list: set, _visited: Optional[set] = None) -> bool:  #!asyncrecdupe!#
+        """Returns True if any member upstream of member_id is in search_list"""
+        visited = _visited if _visited is not None else set()  #!params!#
+        stack = [member_id]
+        while stack:
+            member = self.members[stack.pop()]
+            for inp in member.inputs:
+                if inp in search_list:
+                    return True
+                if inp not in visited:
+                    visited.add(inp)
+                    stack.append(inp)
+        return False
 
     def get_members(self, incl_types: Any = 'all', excl_types=None) -> List[Member]:
+        """Returns the members matching the types, cached until the members are reloaded"""
+        cache_key = (incl_types if incl_types == 'all' else tuple(incl_types), tuple(excl_types or ()))
+        if cache_key in self.members_cache:
+            return self.members_cache[cache_key]
+
         if incl_types == 'all':
-            incl_types = ('agent', 'workflow', 'user', 'tool', 'block', 'node')
-        excl_types = excl_types or []
-        excl_types = [e for e in excl_types]
-        excl_types.append('node')
-        incl_types = tuple(t for t in incl_types if t not in excl_types)
+            incl_types = ALL_MEMBER_TYPES
+        excl_types = {'node', *(excl_types or ())}
+        incl_types = frozenset(incl_types).difference(excl_types)
         matched_members = [m for m in self.members.values() if m.config.get('_TYPE', 'agent') in incl_types]
         if self._parent_workflow is not None:  # todo !userbypass
             if matched_members[0].config.get('_TYPE', 'agent') == 'user':
                 matched_members = matched_members[1:]
+        self.members_cache[cache_key] = matched_members
         return matched_members
 
     def count_members(self, incl_types='all', excl_initial_user=True) -> int:
@@ -321,26 +395,24 @@ class Workflow(Member):
 
     def next_expected_is_last_member(self) -> bool:
         """Returns True if the next expected member is the last member"""
-        only_one_empty = len([member for member in self.get_members() if member.turn_output is None]) == 1
+        only_one_empty = sum(1 for member in self.get_members() if member.turn_output is None) == 1
         return only_one_empty  #!99!#  #!looper!#
 
     def get_member_async_group(self, member_id) -> Optional[List[str]]:
-        for box in self.boxes:
-            if member_id in box:
-                return [b for b in box if self.last_output is None]
-        return None  # [member_id]
+        box_index = self.member_box_indexes.get(member_id)
+        if box_index is None:
+            return None  # [member_id]
+        return [b for b in self.boxes[box_index] if self.last_output is None]
 
     def get_member_config(self, member_id) -> Dict[str, Any]:
         member = self.members.get(member_id)
         return member.config if member else {}
 
     def reset_last_outputs(self):
-        """Reset the last_output and turn_output of all members."""
-        for member in self.members.values():
+        """Reset the last_output and turn_output of all members, including nested members."""
+        for member in self.flat_members.values():
             member.last_output = None
             member.turn_output = None
-            if isinstance(member, Workflow):
-                member.reset_last_outputs()
 
     def set_last_outputs(self, map_dict):  # {full_member_id: output}
         for k, v in map_dict.items():
@@ -356,15 +428,7 @@ class Workflow(Member):
 
     def get_member_by_full_member_id(self, full_member_id: str) -> Optional[Member]:
         """Returns the member object based on the full member id (e.g. '1.2.3')"""
-        full_split = full_member_id.split('.')
-        workflow = self
-        member = None
-        for local_id in full_split:
-            member = workflow.members.get(local_id)
-            if member is None:
-                return None
-            workflow = member
-        return member
+        return self.flat_members.get(str(full_member_id))
 
     def save_message(
         self, role: str,
@@ -380,9 +444,9 @@ class Workflow(Member):
             return None
 
         if self._parent_workflow is None:
-            new_run = None not in [member.turn_output for member in self.get_members()]  #!looper!#
+            new_run = not any(member.turn_output is None for member in self.get_members())  #!looper!#
             if new_run:
-                self.message_history.alt_turn_state = 1 - self.message_history.alt_turn_state
+                self.message_history.alt_turn_state ^= 1
 
         return self.message_history.add(role, content, member_id=member_id, log_obj=log_obj)
         # ^ calls message_history.load_messages after
@@ -430,12 +494,37 @@ class Workflow(Member):
                 WHERE id = ?
             );""", (msg_id,))
 
+    def switch_branch_with_msg(self, deactivate_msg_id, activate_msg_id):
+        """Deactivates all branches with deactivate_msg_id and activates the branch with activate_msg_id, in one statement"""
+        sql.execute("""
+            UPDATE contexts
+            SET active = (id = (
+                SELECT context_id
+                FROM contexts_messages
+                WHERE id = ?
+            ))
+            WHERE branch_msg_id = (
+                SELECT branch_msg_id
+                FROM contexts
+                WHERE id = (
+                    SELECT context_id
+                    FROM contexts_messages
+                    WHERE id = ?
+                )
+            )
+            OR id = (
+                SELECT context_id
+                FROM contexts_messages
+                WHERE id = ?
+            );""", (activate_msg_id, deactivate_msg_id, activate_msg_id,))
+
     def get_common_group_key(self):
         """Get all distinct group_keys and if there's only one, return it, otherwise return empty key"""
-        group_keys = set(getattr(member, 'group_key', '') for member in self.members.values())
-        if len(group_keys) == 1:
-            return next(iter(group_keys))
-        return ''
+        group_keys = (getattr(member, 'group_key', '') for member in self.members.values())
+        common_key = next(group_keys, '')
+        if any(group_key != common_key for group_key in group_keys):
+            return ''
+        return common_key
 
     def update_behaviour(self):
         """Update the behaviour of the context based on the common key"""
@@ -444,6 +533,10 @@ class Workflow(Member):
         behaviour = ALL_PLUGINS['Workflow'].get(common_group_key, None)
         self.behaviour = behaviour(self) if behaviour else WorkflowBehaviour(self)
 
+        # A plain chat (an agent with an optional initial user) can skip the group & order logic in receive
+        member_types = [m.config.get('_TYPE', 'agent') for m in self.members.values()]
+        self.single_agent_fastpath = self._parent_workflow is None and member_types in (['agent'], ['user', 'agent'])
+
     def get_final_message(self, filter_role='all'):
         """Returns the final output of the workflow"""
         # todo check
@@ -467,13 +560,10 @@ class WorkflowBehaviour:
         def create_async_group_task(member_ids):
             """ Helper function to create and return a coroutine that runs all members in the member_async_group """
             async def run_group():
-                group_tasks = []
-                for member_id in member_ids:
-                    if member_id not in processed_members:
-                        m = self.workflow.members[member_id]
-                        sub_task = asyncio.create_task(run_member_task(m))
-                        group_tasks.append(sub_task)
-                        processed_members.add(member_id)
+                unprocessed_ids = [member_id for member_id in member_ids if member_id not in processed_members]
+                processed_members.update(unprocessed_ids)
+                group_tasks = [asyncio.create_task(run_member_task(self.workflow.members[member_id]))
+                               for member_id in unprocessed_ids]
                 try:
                     await asyncio.gather(*group_tasks)
                 except StopIteration:
@@ -488,6 +578,13 @@ class WorkflowBehaviour:
         if len(self.workflow.members) == 0:
             return
 
+        if self.workflow.single_agent_fastpath:
+            *other_members, agent_member = self.workflow.members.values()
+            if all(m.turn_output is not None for m in other_members):
+                async for key, chunk in self.receive_single(agent_member):
+                    yield key, chunk
+                return
+
         # first_member = next(iter(self.workflow.members.values()))
         # if first_member.config.get('_TYPE', 'agent') == 'user':  #!33!#
         #     from_member_id = first_member.member_id
@@ -532,8 +629,8 @@ class WorkflowBehaviour:
                 final_message = self.workflow.get_final_message(filter_role=filter_role)
                 if final_message:
                     full_member_id = self.workflow.full_member_id()
-                    log_obj = sql.get_scalar("SELECT log FROM contexts_messages WHERE id = ?", (final_message['id'],))
-                    self.workflow.save_message(final_message['role'], final_message['content'], full_member_id, json.loads(log_obj))
+                    log_obj = dict(final_message['log'] or {})  # already loaded with the message, copy as add() sets the id
+                    self.workflow.save_message(final_message['role'], final_message['content'], full_member_id, log_obj)
 
         except asyncio.CancelledError:
             pass  # task was cancelled, so we ignore the exception
@@ -542,10 +639,39 @@ class WorkflowBehaviour:
         finally:
             self.workflow.responding = False
 
+    async def receive_single(self, member):
+        """Runs the only agent of a single agent workflow, same as `receive` but without the group & order logic"""
+        if member.turn_output is not None:
+            return
+
+        filter_role = self.workflow.config.get('config', {}).get('filter_role', 'All').lower()
+        self.workflow.responding = True
+        try:
+            if self.workflow.chat_page:
+                self.workflow.chat_page.workflow_settings.refresh_member_highlights()
+
+            async for key, chunk in member.run_member():
+                if key == 'SYS' and chunk == 'SKIP':
+                    break
+                if key == filter_role or filter_role == 'all':
+                    yield key, chunk
+
+        except (StopIteration, asyncio.CancelledError):
+            pass
+        finally:
+            self.workflow.responding = False
+
     def stop(self):
         self.workflow.stop_requested = True
 
 
+SAVE_AS_QUERIES = {
+    'AGENT': "INSERT INTO entities (name, kind, config) VALUES (?, ?, ?)",
+    'BLOCK': "INSERT INTO blocks (name, config) VALUES (?, ?)",
+    'TOOL': "INSERT INTO tools (uuid, name, config) VALUES (?, ?, ?)",
+}
+
+
 class WorkflowSettings(ConfigWidget):
     def __init__(self, parent, **kwargs):
         super().__init__(parent=parent)
@@ -556,12 +682,32 @@ class WorkflowSettings(ConfigWidget):
         self.setSizePolicy(QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding))
 
         self.members_in_view: Dict[str, DraggableMember] = {}
+        self.member_configs_by_id: Dict[str, Dict[str, Any]] = {}  # the saved member dicts of self.config, by id
         self.inputs_in_view: Dict[Tuple[str, str], ConnectionLine] = {}  # (source_member_id, target_member_id): line
         self.boxes_in_view: List[List[RoundedRectWidget]] = []
 
         self.new_lines: Optional[List[InsertableLine]] = None
         self.new_agents: Optional[List[Tuple[QPointF, InsertableMember]]] = None
         self.adding_line: Optional[ConnectionLine] = None
+        self.simplify_view_cache: Optional[bool] = None  # reset when members or inputs are added, removed or moved
+        self.lines_by_member_cache: Optional[Dict[str, List[ConnectionLine]]] = None  # reset when inputs change
+        self.inputs_map_cache: Optional[Dict[str, List[str]]] = None  # reset when inputs change
+        self.upstream_cache: Dict[str, Set[str]] = {}  # member_id: upstream member_ids, reset when inputs change
+        self.next_member_id: int = 1
+        self.highlighted_member: Optional[DraggableMember] = None
+
+        # collapses bursts of edits (connecting, dragging) into one save
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(150)
+        self.save_timer.timeout.connect(self.save_config)
+        self.queued_save_entity_id = None  # the item selected when the save was queued, the selection can change before it runs
+
+        # collapses the async group and highlight refreshes of a drag into one per event loop turn
+        self.group_refresh_timer = QTimer(self)
+        self.group_refresh_timer.setSingleShot(True)
+        self.group_refresh_timer.setInterval(0)
+        self.group_refresh_timer.timeout.connect(self.refresh_groups)
 
         self.autorun: bool = True
 
@@ -572,6 +718,8 @@ class WorkflowSettings(ConfigWidget):
         self.scene.setSceneRect(0, 0, 2000, 2000)
 
         self.view = CustomGraphicsView(self.scene, self)
+        self.view_h_scrollbar = self.view.horizontalScrollBar()
+        self.view_v_scrollbar = self.view.verticalScrollBar()
 
         self.compact_mode_back_button = self.CompactModeBackButton(parent=self)
         self.member_config_widget = DynamicMemberConfigWidget(parent=self)
@@ -611,6 +759,8 @@ class WorkflowSettings(ConfigWidget):
         self.layout.addWidget(self.splitter)
 
     def load_config(self, json_config=None):
+        self.flush_queued_save()  # while the queued edit's members are still in view, before they're replaced
+
         if json_config is None:
             json_config = {}
         if isinstance(json_config, str):
@@ -623,6 +773,7 @@ class WorkflowSettings(ConfigWidget):
         self.workflow_config.load_config(json_wf_config)
         self.workflow_params.load_config({'data': json_wf_params})  # !55! #
         super().load_config(json_config)
+        self.member_configs_by_id = {m['id']: m for m in self.config.get('members', [])}
 
     def get_config(self):
         workflow_config = self.workflow_config.get_config()
@@ -663,15 +814,37 @@ class WorkflowSettings(ConfigWidget):
 
         return config
 
+    def refresh_groups(self):
+        self.load_async_groups()
+        self.refresh_member_highlights()
+
+    def hideEvent(self, event):
+        self.flush_queued_save()
+        super().hideEvent(event)
+
+    def queue_save_config(self):
+        """Saves the config after a short delay, restarting the delay on each call"""
+        if self.table_name:
+            self.queued_save_entity_id = self.parent.get_selected_item_id()
+        self.save_timer.start()
+
+    def flush_queued_save(self):
+        """Runs the queued save now, if there is one"""
+        if self.save_timer.isActive():
+            self.save_timer.stop()  # subclasses that override save_config don't stop it
+            self.save_config()
+
     def save_config(self):
         """Saves the config to database when modified"""
+        self.save_timer.stop()  # a pending queued save is covered by this one
+        queued_save_entity_id, self.queued_save_entity_id = self.queued_save_entity_id, None
         if not self.table_name:
             return
 
         json_config_dict = self.get_config()
         json_config = json.dumps(json_config_dict)
 
-        entity_id = self.parent.get_selected_item_id()
+        entity_id = queued_save_entity_id or self.parent.get_selected_item_id()
         if not entity_id:
             raise NotImplementedError()
 
@@ -684,7 +857,7 @@ class WorkflowSettings(ConfigWidget):
                 text='Error saving config:\n' + str(e),
             )
 
-        self.load_config(json_config)  # reload config
+        self.load_config(json_config_dict)  # reload config, the dict is already built so skip re-parsing
         self.load_async_groups()
 
         for m in self.members_in_view.values():
@@ -703,13 +876,16 @@ class WorkflowSettings(ConfigWidget):
             self.parent.on_edited()
 
     def load(self):
+        self.flush_queued_save()  # don't lose a queued edit to the reload
+
         self.setUpdatesEnabled(False)
         sel_member_ids = [x.id for x in self.scene.selectedItems()
                           if isinstance(x, DraggableMember)]
 
-        self.load_members()
-        self.load_inputs()
-        self.load_async_groups()
+        with suspend_scene_index(self.scene), block_signals(self.scene, recurse_children=False):
+            self.load_members()
+            self.load_inputs()
+            self.load_async_groups()
         self.member_config_widget.load()
         self.workflow_params.load()
         self.workflow_config.load()
@@ -721,7 +897,7 @@ class WorkflowSettings(ConfigWidget):
         if self.can_simplify_view():
             self.toggle_view(False)
             # Select the member so that it's config is shown, then hide the workflow panel until more members are added
-            other_member_ids = [k for k, m in self.members_in_view.items() if not m.member_config.get('_TYPE', 'agent') == 'user']
+            other_member_ids = [k for k, m in self.members_in_view.items() if m.member_type != 'user']
 
             if other_member_ids:
                 self.select_ids([other_member_ids[0]])
@@ -741,6 +917,7 @@ class WorkflowSettings(ConfigWidget):
         for m_id, member in self.members_in_view.items():
             self.scene.removeItem(member)
         self.members_in_view = {}
+        self.simplify_view_cache = None
 
         members_data = self.config.get('members', [])
         # Iterate over the parsed 'members' data and add them to the scene
@@ -755,6 +932,8 @@ class WorkflowSettings(ConfigWidget):
             self.scene.addItem(member)
             self.members_in_view[_id] = member
 
+        self.next_member_id = max((int(k) for k in self.members_in_view), default=0) + 1
+
     def load_async_groups(self):
         # Clear any existing members from the scene
         for box in self.boxes_in_view:
@@ -766,25 +945,24 @@ class WorkflowSettings(ConfigWidget):
         last_loc_x = -100
         current_box_member_positions = []
         current_box_member_ids = []
+        new_boxes = []  # list of tuple(positions, member_ids)
 
-        members = self.members_in_view.values()
-        members = sorted(members, key=lambda m: m.x())
+        # read each position once, sorting on the precomputed x
+        member_positions = sorted(((m.x(), m.y(), m) for m in self.members_in_view.values()), key=itemgetter(0))
 
-        for member in members:
-            loc_x = member.x()
-            loc_y = member.y()
+        for loc_x, loc_y, member in member_positions:
             pos = QPointF(loc_x, loc_y)
 
-            member_type = member.member_config.get('_TYPE', 'agent')
-            if member_type in ('workflow', 'agent', 'block'):
+            if member.member_type in ('workflow', 'agent', 'block'):
                 if abs(loc_x - last_loc_x) < 10:
-                    current_box_member_positions += [last_member_pos, pos]
-                    current_box_member_ids += [last_member_id, member.id]
+                    if not current_box_member_ids:  # run starts, include the previous member once
+                        current_box_member_positions.append(last_member_pos)
+                        current_box_member_ids.append(last_member_id)
+                    current_box_member_positions.append(pos)
+                    current_box_member_ids.append(member.id)
                 else:
                     if current_box_member_positions:
-                        box = RoundedRectWidget(self, points=current_box_member_positions, member_ids=current_box_member_ids)
-                        self.scene.addItem(box)
-                        self.boxes_in_view.append(box)
+                        new_boxes.append((current_box_member_positions, current_box_member_ids))
                         current_box_member_positions = []
                         current_box_member_ids = []
 
@@ -794,26 +972,24 @@ class WorkflowSettings(ConfigWidget):
 
         # Handle the last group after finishing the loop
         if current_box_member_positions:
-            box = RoundedRectWidget(self, points=current_box_member_positions, member_ids=current_box_member_ids)
+            new_boxes.append((current_box_member_positions, current_box_member_ids))
+
+        # Only add boxes without inputs between their members, instead of adding them all and removing these
+        inputs_map = self.get_member_inputs_map()
+        for box_member_positions, box_member_ids in new_boxes:
+            search_set = set(box_member_ids)
+            if any(self.walk_inputs_recursive(member_id, search_set, inputs_map) for member_id in box_member_ids):
+                continue
+            box = RoundedRectWidget(self, points=box_member_positions, member_ids=box_member_ids)
             self.scene.addItem(box)
             self.boxes_in_view.append(box)
 
-        del_boxes = []
-        for box in self.boxes_in_view:
-            for member_id in box.member_ids:
-                fnd = self.walk_inputs_recursive(member_id, box.member_ids)
-                if fnd:
-                    del_boxes.append(box)
-                    break
-
-        for box in del_boxes:
-            self.scene.removeItem(box)
-            self.boxes_in_view.remove(box)
-
     def load_inputs(self):
         for _, line in self.inputs_in_view.items():
             self.scene.removeItem(line)
         self.inputs_in_view = {}
+        self.simplify_view_cache = None
+        self.invalidate_input_caches()
 
         inputs_data = self.config.get('inputs', [])
         for input_dict in inputs_data:
@@ -830,21 +1006,53 @@ class WorkflowSettings(ConfigWidget):
             self.scene.addItem(line)
             self.inputs_in_view[(source_member_id, target_member_id)] = line
 
-    def walk_inputs_recursive(self, member_id, search_list) -> bool:  #!asyncrecdupe!# todo dupe
-        found = False
-        member_inputs = [k[0] for k, v in self.inputs_in_view.items() if k[1] == member_id and v.config.get('looper', False) is False]
-        for inp in member_inputs:
-            if inp in search_list:
-                return True
-            found = found or self.walk_inputs_recursive(inp, search_list)
-        return found
+    def get_lines_by_member(self) -> Dict[str, List[ConnectionLine]]:
+        """Returns a dict of member_id: [lines] for every line connected to the member"""
+        if self.lines_by_member_cache is None:
+            self.lines_by_member_cache = {}
+            for (source_member_id, target_member_id), line in self.inputs_in_view.items():
+                self.lines_by_member_cache.setdefault(source_member_id, []).append(line)
+                if target_member_id != source_member_id:
+                    self.lines_by_member_cache.setdefault(target_member_id, []).append(line)
+        return self.lines_by_member_cache
+
+    def invalidate_input_caches(self):
+        self.lines_by_member_cache = None
+        self.inputs_map_cache = None
+        self.upstream_cache = {}
+
+    def get_member_inputs_map(self) -> Dict[str, List[str]]:
+        """Returns a dict of target_member_id: [source_member_ids] for all non looper inputs"""
+        inputs_map = {}
+        for (source_member_id, target_member_id), line in self.inputs_in_view.items():
+            if line.config.get('looper', False) is False:
+                inputs_map.setdefault(target_member_id, []).append(source_member_id)
+        return inputs_map
+
+    def walk_inputs_recursive(self, member_id, search_list, inputs_map=None) -> bool:  #!asyncrecdupe!# todo dupe
+        """Returns True if any member upstream of member_id is in search_list"""
+        if inputs_map is None:
+            inputs_map = self.get_member_inputs_map()
+        search_set = set(search_list)
+        visited = set()
+        stack = [member_id]
+        while stack:
+            for inp in inputs_map.get(stack.pop(), ()):
+                if inp in search_set:
+                    return True
+                if inp not in visited:
+                    visited.add(inp)
+                    stack.append(inp)
+        return False
 
     def update_member(self, update_list, save=False):
-        for member_id, attribute, value in update_list:
+        # consecutive updates to the same member share one lookup, unknown members are skipped
+        for member_id, member_updates in groupby(update_list, key=itemgetter(0)):
             member = self.members_in_view.get(member_id)
             if not member:
-                return
-            setattr(member, attribute, value)
+                continue
+            for _, attribute, value in member_updates:
+                setattr(member, attribute, value)
 
         if save:
             self.save_config()
@@ -860,34 +1068,37 @@ class WorkflowSettings(ConfigWidget):
         return member_count
 
     def can_simplify_view(self):  # !wfdiff! #
+        if self.simplify_view_cache is None:
+            self.simplify_view_cache = self.check_can_simplify_view()
+        return self.simplify_view_cache
+
+    def check_can_simplify_view(self):
         member_count = len(self.members_in_view)
         input_count = len(self.inputs_in_view)
         if input_count > 0:
             return False
         if member_count == 1:
-            member_config = next(iter(self.members_in_view.values())).member_config
+            member_type = next(iter(self.members_in_view.values())).member_type
             types_to_simplify = ['block']
-            if member_config.get('_TYPE', 'agent') in types_to_simplify:
+            if member_type in types_to_simplify:
                 return True
         elif member_count == 2:
-            members = list(self.members_in_view.values())
-            members.sort(key=lambda x: x.x())
-            first_member = members[0]
-            second_member = members[1]
+            member_a, member_b = self.members_in_view.values()
+            first_member, second_member = (member_a, member_b) if member_a.x() <= member_b.x() else (member_b, member_a)
             if first_member.member_type == 'user' and second_member.member_type == 'agent':
                 return True
         return False
 
     def toggle_view(self, visible):
         self.view.setVisible(visible)
-        QTimer.singleShot(10, lambda: self.splitter.setSizes([300 if visible else 22, 0 if visible else 1000]))
+        QTimer.singleShot(10, partial(self.splitter.setSizes, [300, 0] if visible else [22, 1000]))
         self.splitter.setHandleWidth(0 if not visible else 3)
 
         self.reposition_view()
 
     def reposition_view(self):
-        self.view.horizontalScrollBar().setValue(0)
-        self.view.verticalScrollBar().setValue(0)
+        self.view_h_scrollbar.setValue(0)
+        self.view_v_scrollbar.setValue(0)
 
     def set_edit_mode(self, state):
         if not self.compact_mode:
@@ -918,13 +1129,17 @@ class WorkflowSettings(ConfigWidget):
         self.compact_mode_back_button.setVisible(state)
 
     def select_ids(self, ids, send_signal=True):
+        # only toggle items whose selection changes, the scene's selection is the source of truth
+        to_select = {self.members_in_view[_id] for _id in ids if _id in self.members_in_view}
         with block_signals(self.scene):
             for item in self.scene.selectedItems():
-                item.setSelected(False)
+                if item in to_select:
+                    to_select.discard(item)
+                else:
+                    item.setSelected(False)
 
-            for _id in ids:  # todo clean
-                if _id in self.members_in_view:
-                    self.members_in_view[_id].setSelected(True)
+            for member in to_select:
+                member.setSelected(True)
         if send_signal:
             self.on_selection_changed()
 
@@ -1022,30 +1237,33 @@ class WorkflowSettings(ConfigWidget):
         self.view.setFocus()
 
     def add_entity(self):
-        member_in_view_int_keys = [int(k) for k in self.members_in_view.keys()]
-        start_member_id = max(member_in_view_int_keys) + 1 if len(self.members_in_view) else 1
+        start_member_id = self.next_member_id
+        self.next_member_id += len(self.new_agents)
 
         member_index_id_map = {}
-        for i, enitity_tup in enumerate(self.new_agents):
-            entity_id = str(start_member_id + i)
-            pos, entity = enitity_tup
-            entity_config = entity.config
-            loc_x, loc_y = entity.x(), entity.y()
-            member = DraggableMember(self, entity_id, loc_x, loc_y, entity_config)
-            self.scene.addItem(member)
-            self.members_in_view[entity_id] = member
-            member_index_id_map[i] = entity_id
-
-        for new_line in self.new_lines or []:
-            source_member_id = member_index_id_map[new_line.source_member_index]
-            target_member_id = member_index_id_map[new_line.target_member_index]
-            source_member = self.members_in_view[source_member_id]
-            target_member = self.members_in_view[target_member_id]
-
-            line = ConnectionLine(self, source_member, target_member, new_line.config)
-            self.scene.addItem(line)
-            self.inputs_in_view[(source_member_id, target_member_id)] = line
-
+        with suspend_scene_index(self.scene), block_signals(self.scene, recurse_children=False):
+            for i, enitity_tup in enumerate(self.new_agents):
+                entity_id = str(start_member_id + i)
+                pos, entity = enitity_tup
+                entity_config = entity.config
+                loc_x, loc_y = entity.x(), entity.y()
+                member = DraggableMember(self, entity_id, loc_x, loc_y, entity_config)
+                self.scene.addItem(member)
+                self.members_in_view[entity_id] = member
+                member_index_id_map[i] = entity_id
+
+            for new_line in self.new_lines or []:
+                source_member_id = member_index_id_map[new_line.source_member_index]
+                target_member_id = member_index_id_map[new_line.target_member_index]
+                source_member = self.members_in_view[source_member_id]
+                target_member = self.members_in_view[target_member_id]
+
+                line = ConnectionLine(self, source_member, target_member, new_line.config)
+                self.scene.addItem(line)
+                self.inputs_in_view[(source_member_id, target_member_id)] = line
+
+        self.simplify_view_cache = None
+        self.invalidate_input_caches()
         self.view.cancel_new_line()
         self.view.cancel_new_entity()
 
@@ -1059,13 +1277,10 @@ class WorkflowSettings(ConfigWidget):
 
         source_member_id = self.adding_line.source_member_id
 
-        if target_member_id == source_member_id:
+        if target_member_id == source_member_id or (source_member_id, target_member_id) in self.inputs_in_view:
             return
-        if (source_member_id, target_member_id) in self.inputs_in_view:
-            return
-        cr_check = self.check_for_circular_references(target_member_id, [source_member_id])
         is_looper = self.adding_line.config.get('looper', False)
-        if cr_check and not is_looper:
+        if not is_looper and self.check_for_circular_references(target_member_id, [source_member_id]):
             main = find_main_widget(self)
             if main:
                 main.notification_manager.show_notification(
@@ -1089,47 +1304,62 @@ class WorkflowSettings(ConfigWidget):
             'agent'
         ]
 
-        if target_member.member_config.get('_TYPE', 'agent') == 'workflow':
+        if target_member.member_type == 'workflow':
             first_member = next(iter(sorted(target_member.member_config['members'], key=lambda x: x['loc_x'])), None)
             if first_member:
                 first_member_is_user = first_member['config'].get('_TYPE', 'agent') == 'user'
                 if first_member_is_user:
                     allows_messages.append('workflow')
 
-        if target_member.member_config.get('_TYPE', 'agent') in allows_messages:
+        if target_member.member_type in allows_messages:
             config['mappings.data'] = [{'source': 'Output', 'target': 'Message'}]
         line = ConnectionLine(self, source_member, target_member, config)
         self.scene.addItem(line)
         self.inputs_in_view[(source_member_id, target_member_id)] = line
 
+        self.simplify_view_cache = None
+        self.invalidate_input_caches()
         self.scene.removeItem(self.adding_line)
         self.adding_line = None
-        self.save_config()
+        self.queue_save_config()
 
     def check_for_circular_references(self, target_member_id, input_member_ids):
-        """ Recursive function to check for circular references"""
-        connected_input_members = [line_key[0] for line_key, line in self.inputs_in_view.items()
-                                   if line_key[1] in input_member_ids
-                                   and line.config.get('looper', False) is False]
-        if target_member_id in connected_input_members:
-            return True
-        if len(connected_input_members) == 0:
-            return False
-        return self.check_for_circular_references(target_member_id, connected_input_members)
+        """Returns True if target_member_id is upstream of any of input_member_ids (ignoring looper inputs)"""
+        return any(target_member_id in self.get_upstream_members(member_id) for member_id in input_member_ids)
+
+    def get_upstream_members(self, member_id) -> Set[str]:
+        """Returns the ids of all members upstream of member_id (ignoring looper inputs), cached until the inputs change"""
+        upstream = self.upstream_cache.get(member_id)
+        if upstream is None:
+            if self.inputs_map_cache is None:
+                self.inputs_map_cache = self.get_member_inputs_map()
+            upstream = set()
+            stack = [member_id]
+            while stack:
+                for source_member_id in self.inputs_map_cache.get(stack.pop(), ()):
+                    if source_member_id not in upstream:
+                        upstream.add(source_member_id)
+                        stack.append(source_member_id)
+            self.upstream_cache[member_id] = upstream
+        return upstream
 
     def refresh_member_highlights(self):
         if self.compact_mode or not self.linked_workflow():
             return
-        for member in self.members_in_view.values():
-            member.highlight_background.hide()
 
         workflow = self.linked_workflow()
         next_expected_member = workflow.next_expected_member()
-        if not next_expected_member:
-            return
+        highlight_member = self.members_in_view[next_expected_member.member_id] if next_expected_member else None
 
-        if next_expected_member:
-            self.members_in_view[next_expected_member.member_id].highlight_background.show()
+        # Only touch the previous and new highlights, members that were reloaded start hidden
+        previous_member = self.highlighted_member
+        if highlight_member is previous_member and (previous_member is None or previous_member.highlight_background.isVisible()):
+            return
+        if previous_member is not None:
+            previous_member.highlight_background.hide()
+        if highlight_member is not None:
+            highlight_member.highlight_background.show()
+        self.highlighted_member = highlight_member
 
     def goto_member(self, full_member_id):
         member_ids = full_member_id.split('.')
@@ -1173,6 +1403,13 @@ class WorkflowSettings(ConfigWidget):
             self.show_hidden_bubbles = False
             self.show_nested_bubbles = False
 
+            # context menus are built on first use and reused after
+            self.add_menu = None
+            self.save_menu = None
+            self.view_menu = None
+            self.show_hidden_action = None
+            self.show_nested_action = None
+
             self.btn_add = IconButton(
                 parent=self,
                 icon_path=':/resources/icon-new.png',
@@ -1311,30 +1548,31 @@ class WorkflowSettings(ConfigWidget):
             page_chat.workspace_window = None  # Reset the reference when the secondary window is closed
 
         def show_add_context_menu(self):
-            menu = QMenu(self)
-
-            add_agent = menu.addAction('Agent')
-            add_user = menu.addAction('User')
-            add_text = menu.addAction('Text')
-            add_code = menu.addAction('Code')
-            add_prompt = menu.addAction('Prompt')
-            add_node = menu.addAction('Node')
-            # add_tool = menu.addAction('Tool')
-            add_agent.triggered.connect(partial(self.choose_member, "AGENT"))
-            add_user.triggered.connect(partial(
-                self.parent.add_insertable_entity,
-                {"_TYPE": "user"}
-            ))
-            add_node.triggered.connect(partial(
-                self.parent.add_insertable_entity,
-                {"_TYPE": "node"}
-            ))
-
-            add_text.triggered.connect(partial(self.choose_member, "TEXT"))
-            add_code.triggered.connect(partial(self.choose_member, "CODE"))
-            add_prompt.triggered.connect(partial(self.choose_member, "PROMPT"))
-
-            menu.exec_(QCursor.pos())
+            if self.add_menu is None:
+                self.add_menu = QMenu(self)
+
+                add_agent = self.add_menu.addAction('Agent')
+                add_user = self.add_menu.addAction('User')
+                add_text = self.add_menu.addAction('Text')
+                add_code = self.add_menu.addAction('Code')
+                add_prompt = self.add_menu.addAction('Prompt')
+                add_node = self.add_menu.addAction('Node')
+                # add_tool = self.add_menu.addAction('Tool')
+                add_agent.triggered.connect(partial(self.choose_member, "AGENT"))
+                add_user.triggered.connect(partial(
+                    self.parent.add_insertable_entity,
+                    {"_TYPE": "user"}
+                ))
+                add_node.triggered.connect(partial(
+                    self.parent.add_insertable_entity,
+                    {"_TYPE": "node"}
+                ))
+
+                add_text.triggered.connect(partial(self.choose_member, "TEXT"))
+                add_code.triggered.connect(partial(self.choose_member, "CODE"))
+                add_prompt.triggered.connect(partial(self.choose_member, "PROMPT"))
+
+            self.add_menu.exec_(QCursor.pos())
 
         def choose_member(self, list_type):
             self.parent.set_edit_mode(True)
@@ -1347,14 +1585,15 @@ class WorkflowSettings(ConfigWidget):
             list_dialog.open()
 
         def show_save_context_menu(self):
-            menu = QMenu(self)
-            save_agent = menu.addAction('Save as Agent')
-            save_agent.triggered.connect(partial(self.save_as, 'AGENT'))
-            save_block = menu.addAction('Save as Block')
-            save_block.triggered.connect(partial(self.save_as, 'BLOCK'))
-            save_tool = menu.addAction('Save as Tool')
-            save_tool.triggered.connect(partial(self.save_as, 'TOOL'))
-            menu.exec_(QCursor.pos())
+            if self.save_menu is None:
+                self.save_menu = QMenu(self)
+                save_agent = self.save_menu.addAction('Save as Agent')
+                save_agent.triggered.connect(partial(self.save_as, 'AGENT'))
+                save_block = self.save_menu.addAction('Save as Block')
+                save_block.triggered.connect(partial(self.save_as, 'BLOCK'))
+                save_tool = self.save_menu.addAction('Save as Tool')
+                save_tool.triggered.connect(partial(self.save_as, 'TOOL'))
+            self.save_menu.exec_(QCursor.pos())
 
         def save_as(self, save_type):
             new_name, ok = QInputDialog.getText(self, f"New {save_type.capitalize()}", f"Enter the name for the new {save_type.lower()}:")
@@ -1362,23 +1601,14 @@ class WorkflowSettings(ConfigWidget):
                 return
 
             workflow_config = json.dumps(self.parent.get_config())
+            if save_type == 'AGENT':
+                params = (new_name, 'AGENT', workflow_config,)
+            elif save_type == 'BLOCK':
+                params = (new_name, workflow_config,)
+            else:
+                params = (str(uuid.uuid4()), new_name, workflow_config,)
             try:
-                if save_type == 'AGENT':
-                    sql.execute("""
-                        INSERT INTO entities (name, kind, config)
-                        VALUES (?, ?, ?)
-                    """, (new_name, 'AGENT', workflow_config,))
-
-                elif save_type == 'BLOCK':
-                    sql.execute("""
-                        INSERT INTO blocks (name, config)
-                        VALUES (?, ?)
-                    """, (new_name, workflow_config,))
-                elif save_type == 'TOOL':
-                    sql.execute("""
-                        INSERT INTO tools (uuid, name, config)
-                        VALUES (?, ?, ?)
-                    """, (str(uuid.uuid4()), new_name, workflow_config,))
+                sql.execute(SAVE_AS_QUERIES[save_type], params)
 
                 main = find_main_widget(self)
                 if main:
@@ -1419,68 +1649,78 @@ class WorkflowSettings(ConfigWidget):
             if not workflow:
                 return
 
-            sql.execute("""
-                WITH RECURSIVE delete_contexts(id) AS (
-                    SELECT id FROM contexts WHERE id = ?
-                    UNION ALL
-                    SELECT contexts.id FROM contexts
-                    JOIN delete_contexts ON contexts.parent_id = delete_contexts.id
-                )
-                DELETE FROM contexts_messages WHERE context_id IN delete_contexts;
-            """, (workflow.context_id,))
-            sql.execute("""
-            DELETE FROM contexts_messages WHERE context_id = ?""",
-                        (workflow.context_id,))
-            sql.execute("""
-                WITH RECURSIVE delete_contexts(id) AS (
-                    SELECT id FROM contexts WHERE id = ?
-                    UNION ALL
-                    SELECT contexts.id FROM contexts
-                    JOIN delete_contexts ON contexts.parent_id = delete_contexts.id
-                )
-                DELETE FROM contexts WHERE id IN delete_contexts AND id != ?;
-            """, (workflow.context_id, workflow.context_id,))
+            # walk the context tree once into a temp table, then delete in one transaction
+            sql.execute_multiple([
+                "CREATE TEMP TABLE IF NOT EXISTS delete_contexts (id INTEGER PRIMARY KEY)",
+                "DELETE FROM delete_contexts",
+                """
+                    INSERT INTO delete_contexts (id)
+                    WITH RECURSIVE tree_contexts(id) AS (
+                        SELECT id FROM contexts WHERE id = ?
+                        UNION ALL
+                        SELECT contexts.id FROM contexts
+                        JOIN tree_contexts ON contexts.parent_id = tree_contexts.id
+                    )
+                    SELECT id FROM tree_contexts
+                """,
+                "DELETE FROM contexts_messages WHERE context_id IN (SELECT id FROM delete_contexts)",
+                "DELETE FROM contexts WHERE id IN (SELECT id FROM delete_contexts) AND id != ?",
+            ], [
+                (),
+                (),
+                (workflow.context_id,),
+                (),
+                (workflow.context_id,),
+            ])
 
             if hasattr(self.parent.parent, 'main'):
                 self.parent.parent.main.page_chat.load()
 
         def toggle_member_list(self):
             is_checked = self.btn_member_list.isChecked()
-            self.parent.member_list.setVisible(is_checked)
+            self.set_panel_visible(self.parent.member_list, is_checked)
 
         def toggle_workflow_params(self):
             self.untoggle_all(except_obj=self.btn_workflow_params)
             is_checked = self.btn_workflow_params.isChecked()
-            self.parent.workflow_params.setVisible(is_checked)
+            self.set_panel_visible(self.parent.workflow_params, is_checked)
 
         def toggle_workflow_config(self):
             self.untoggle_all(except_obj=self.btn_workflow_config)
             is_checked = self.btn_workflow_config.isChecked()
-            self.parent.workflow_config.setVisible(is_checked)
+            self.set_panel_visible(self.parent.workflow_config, is_checked)
 
         def untoggle_all(self, except_obj=None):
-            if self.btn_workflow_params.isChecked() and except_obj != self.btn_workflow_params:
+            if self.btn_workflow_params.isChecked() and except_obj is not self.btn_workflow_params:
                 self.btn_workflow_params.setChecked(False)
-                self.parent.workflow_params.setVisible(False)
-            if self.btn_workflow_config.isChecked() and except_obj != self.btn_workflow_config:
+                self.set_panel_visible(self.parent.workflow_params, False)
+            if self.btn_workflow_config.isChecked() and except_obj is not self.btn_workflow_config:
                 self.btn_workflow_config.setChecked(False)
-                self.parent.workflow_config.setVisible(False)
+                self.set_panel_visible(self.parent.workflow_config, False)
+
+        @staticmethod
+        def set_panel_visible(panel, visible):
+            # setVisible invalidates the layout even when nothing changes
+            if panel.isHidden() == visible:
+                panel.setVisible(visible)
 
         def btn_view_clicked(self):
-            menu = QMenu(self)
-            show_hidden = menu.addAction('Show hidden bubbles')
-            show_nested = menu.addAction('Show nested bubbles')
-            show_hidden.setCheckable(True)
-            show_nested.setCheckable(True)
-            show_hidden.setChecked(self.show_hidden_bubbles)
-            show_nested.setChecked(self.show_nested_bubbles)
-            show_hidden.triggered.connect(partial(self.toggle_attribute, 'show_hidden_bubbles'))
-            show_nested.triggered.connect(partial(self.toggle_attribute, 'show_nested_bubbles'))
+            if self.view_menu is None:
+                self.view_menu = QMenu(self)
+                self.show_hidden_action = self.view_menu.addAction('Show hidden bubbles')
+                self.show_nested_action = self.view_menu.addAction('Show nested bubbles')
+                self.show_hidden_action.setCheckable(True)
+                self.show_nested_action.setCheckable(True)
+                self.show_hidden_action.triggered.connect(partial(self.toggle_attribute, 'show_hidden_bubbles'))
+                self.show_nested_action.triggered.connect(partial(self.toggle_attribute, 'show_nested_bubbles'))
+
+            self.show_hidden_action.setChecked(self.show_hidden_bubbles)
+            self.show_nested_action.setChecked(self.show_nested_bubbles)
 
             self.btn_view.setChecked(self.show_hidden_bubbles or self.show_nested_bubbles)
 
             # top right corner is at cursor position
-            menu.exec_(QCursor.pos() - QPoint(menu.sizeHint().width(), 0))
+            self.view_menu.exec_(QCursor.pos() - QPoint(self.view_menu.sizeHint().width(), 0))
 
         def toggle_attribute(self, attr):
             setattr(self, attr, not getattr(self, attr))
@@ -1491,61 +1731,90 @@ class WorkflowSettings(ConfigWidget):
 
     class MemberList(QWidget):
         """This widget displays a list of members in the chat."""
+        SCHEMA = [  # shared between instances, not mutated
+            {
+                'text': 'Members',
+                'type': str,
+                'width': 150,
+                'image_key': 'avatar',
+            },
+            {
+                'key': 'id',
+                'text': '',
+                'type': int,
+                'visible': False,
+            },
+            {
+                'key': 'avatar',
+                'text': '',
+                'type': str,
+                'visible': False,
+            },
+        ]
+
         def __init__(self, parent):
             super().__init__(parent)
             self.parent = parent
             self.block_flag = False  # todo clean
+            self.display_cache = {}  # member_id: (config, name, avatar_paths)
+            self.needs_load = True
 
             self.layout = CVBoxLayout(self)
             self.layout.setContentsMargins(0, 5, 0, 0)
 
             self.tree_members = BaseTreeWidget(self)
-            self.schema = [
-                {
-                    'text': 'Members',
-                    'type': str,
-                    'width': 150,
-                    'image_key': 'avatar',
-                },
-                {
-                    'key': 'id',
-                    'text': '',
-                    'type': int,
-                    'visible': False,
-                },
-                {
-                    'key': 'avatar',
-                    'text': '',
-                    'type': str,
-                    'visible': False,
-                },
-            ]
-            self.tree_members.itemSelectionChanged.connect(self.on_selection_changed)
+            self.schema = self.SCHEMA
+            # a multi select emits itemSelectionChanged per item, so push the selection once when they settle
+            self.selection_timer = QTimer(self)
+            self.selection_timer.setSingleShot(True)
+            self.selection_timer.setInterval(0)
+            self.selection_timer.timeout.connect(self.on_selection_changed)
+            self.tree_members.itemSelectionChanged.connect(self.selection_timer.start)
             self.tree_members.build_columns_from_schema(self.schema)
+            self.tree_members.setUniformRowHeights(True)  # all rows are one avatar + name high
             self.tree_members.setFixedWidth(150)
             self.layout.addWidget(self.tree_members)
             self.layout.addStretch(1)
 
         def load(self):
+            if self.isHidden():  # the list is usually hidden, so rebuild it when it's next shown
+                self.needs_load = True
+                return
+            self.needs_load = False
+
             selected_ids = self.tree_members.get_selected_item_ids()
             data = [
-                [
-                    get_member_name_from_config(m.config),
-                    m.member_id,
-                    get_avatar_paths_from_config(m.config, merge_multiple=True),
-                ]
+                [name, m.member_id, avatar_paths]
                 for m in self.parent.linked_workflow().members.values()
+                for name, avatar_paths in (self.get_member_display(m),)
             ]
-            self.tree_members.load(
-                data=data,
-                folders_data=[],
-                schema=self.schema,
-                readonly=True,
-                silent_select_id=selected_ids,
-            )
-            # set height to fit all items & header
-            height = self.tree_members.sizeHintForRow(0) * (len(data) + 1)
-            self.tree_members.setFixedHeight(height)
+            # paint once after the rows and height are set, instead of while they're built
+            self.tree_members.setUpdatesEnabled(False)
+            try:
+                self.tree_members.load(
+                    data=data,
+                    folders_data=[],
+                    schema=self.schema,
+                    readonly=True,
+                    silent_select_id=selected_ids,
+                )
+                # set height to fit all items & header
+                height = self.tree_members.sizeHintForRow(0) * (len(data) + 1)
+                self.tree_members.setFixedHeight(height)
+            finally:
+                self.tree_members.setUpdatesEnabled(True)
+
+        def get_member_display(self, member):
+            """Returns the (name, avatar paths) of a member, reused while its config is the same object"""
+            cached = self.display_cache.get(member.member_id)
+            if cached is None or cached[0] is not member.config:
+                cached = (
+                    member.config,
+                    get_member_name_from_config(member.config),
+                    get_avatar_paths_from_config(member.config, merge_multiple=True),
+                )
+                self.display_cache[member.member_id] = cached
+            return cached[1], cached[2]
 
         def on_selection_changed(self):
             # push selection to view
@@ -1554,9 +1823,15 @@ class WorkflowSettings(ConfigWidget):
             self.parent.select_ids(all_selected_ids, send_signal=False)
             self.block_flag = False
 
+        def showEvent(self, event):
+            super().showEvent(event)
+            if self.needs_load:
+                self.load()
+                self.refresh_selected()
+
         def refresh_selected(self):
             # get selection from view
-            if self.block_flag:
+            if self.block_flag or self.needs_load:
                 return
             selected_objects = self.parent.scene.selectedItems()
             selected_members = [x for x in selected_objects if isinstance(x, DraggableMember)]
@@ -1565,38 +1840,40 @@ class WorkflowSettings(ConfigWidget):
                 self.tree_members.select_items_by_id(selected_member_ids)
 
     class WorkflowParams(ConfigJsonTree):
+        SCHEMA = [  # shared between instances, not mutated
+            {
+                'text': 'Name',
+                'type': str,
+                'width': 120,
+                'default': '< Enter a parameter name >',
+            },
+            {
+                'text': 'Description',
+                'type': str,
+                'stretch': True,
+                'default': '',
+            },
+            {
+                'text': 'Type',
+                'type': ('String', 'Int', 'Float', 'Bool',),
+                'width': 100,
+                'on_edit_reload': True,
+                'default': 'String',
+            },
+            {
+                'text': 'Req',
+                'type': bool,
+                'default': True,
+            },
+        ]
+
         def __init__(self, parent):
             super().__init__(parent=parent,
                              add_item_prompt=('NA', 'NA'),
                              del_item_prompt=('NA', 'NA'),)
             self.parent = parent
             self.hide()
-            self.schema = [
-                {
-                    'text': 'Name',
-                    'type': str,
-                    'width': 120,
-                    'default': '< Enter a parameter name >',
-                },
-                {
-                    'text': 'Description',
-                    'type': str,
-                    'stretch': True,
-                    'default': '',
-                },
-                {
-                    'text': 'Type',
-                    'type': ('String', 'Int', 'Float', 'Bool',),
-                    'width': 100,
-                    'on_edit_reload': True,
-                    'default': 'String',
-                },
-                {
-                    'text': 'Req',
-                    'type': bool,
-                    'default': True,
-                },
-            ]
+            self.schema = self.SCHEMA
 
     class WorkflowConfig(ConfigJoined):
         def __init__(self, parent):
@@ -1643,6 +1920,7 @@ class CustomGraphicsView(QGraphicsView):
         self._mouse_press_pos = None
         self._mouse_press_scroll_x_val = None
         self._mouse_press_scroll_y_val = None
+        self._last_move_pos = None
 
         self.temp_block_move_flag = False
 
@@ -1653,9 +1931,7 @@ class CustomGraphicsView(QGraphicsView):
         self.setTransformationAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
         self.setResizeAnchor(QGraphicsView.ViewportAnchor.AnchorUnderMouse)
 
-        from src.gui.style import TEXT_COLOR
-        from src.utils.helpers import apply_alpha_to_hex
-        self.setBackgroundBrush(QBrush(QColor(apply_alpha_to_hex(TEXT_COLOR, 0.05))))
+        self.setBackgroundBrush(QBrush(QColor(apply_alpha_to_hex(style.TEXT_COLOR, 0.05))))
         self.setFrameShape(QFrame.Shape.NoFrame)
 
         self.setDragMode(QGraphicsView.RubberBandDrag)
@@ -1735,6 +2011,8 @@ class CustomGraphicsView(QGraphicsView):
             start_text = 'WORKFLOW_MEMBERS:'
             if copied_data.startswith(start_text):
                 copied_data = copied_data[len(start_text):]
+            elif not copied_data.lstrip().startswith('['):
+                return  # not a member bundle, don't parse arbitrary clipboard text
 
             member_bundle = json.loads(copied_data)
             member_configs = member_bundle[0]
@@ -1774,7 +2052,7 @@ class CustomGraphicsView(QGraphicsView):
         if can_simplify_view:
             self.parent.toggle_view(False)  # .view.hide()  # !68! # 31
             # Select the member so that it's config is shown, then hide the workflow panel until more members are added
-            other_member_ids = [k for k, m in self.parent.members_in_view.items() if not m.member_config.get('_TYPE', 'agent') == 'user']  # .member_type != 'user']
+            other_member_ids = [k for k, m in self.parent.members_in_view.items() if m.member_type != 'user']
             if other_member_ids:
                 self.parent.select_ids([other_member_ids[0]])
 
@@ -1782,52 +2060,35 @@ class CustomGraphicsView(QGraphicsView):
         del_member_ids = set()
         del_inputs = set()
         all_del_objects = []
-        all_del_objects_old_brushes = []
-        all_del_objects_old_pens = []
 
         for selected_item in self.parent.scene.selectedItems():
-            all_del_objects.append(selected_item)
-
             if isinstance(selected_item, DraggableMember):
                 del_member_ids.add(selected_item.id)
-
-                # Loop through all lines to find the ones connected to the selected agent
-                for key, line in self.parent.inputs_in_view.items():
-                    source_member_id, target_member_id = key
-                    if target_member_id == selected_item.id or source_member_id == selected_item.id:
-                        del_inputs.add((source_member_id, target_member_id))
-                        all_del_objects.append(line)
-
             elif isinstance(selected_item, ConnectionLine):
                 del_inputs.add((selected_item.source_member_id, selected_item.target_member_id))
+            all_del_objects.append(selected_item)
+
+        # Find the lines connected to the selected members,
+        #   skipping lines that are already included so each item is tinted and removed once
+        lines_by_member = self.parent.get_lines_by_member()
+        for member_id in del_member_ids:
+            for line in lines_by_member.get(member_id, []):
+                key = (line.source_member_id, line.target_member_id)
+                if key in del_inputs:
+                    continue
+                del_inputs.add(key)
+                all_del_objects.append(line)
 
         del_count = len(del_member_ids) + len(del_inputs)
         if del_count == 0:
             return
 
-        # fill all objects with a red tint at 30% opacity, overlaying the current item image
+        # tint all objects red while confirming, the effect is composited by Qt so no pixmaps are copied
         for item in all_del_objects:
-            old_brush = item.brush()
-            all_del_objects_old_brushes.append(old_brush)
-            # modify old brush and add a 30% opacity red fill
-            old_pixmap = old_brush.texture()
-            new_pixmap = old_pixmap.copy()
-            painter = QPainter(new_pixmap)
-            painter.setCompositionMode(QPainter.CompositionMode_SourceAtop)
-
-            painter.fillRect(new_pixmap.rect(),
-                             QColor(255, 0, 0, 126))
-            painter.end()
-            new_brush = QBrush(new_pixmap)
-            item.setBrush(new_brush)
-
-            old_pen = item.pen()
-            all_del_objects_old_pens.append(old_pen)
-            new_pen = QPen(QColor(255, 0, 0, 255),
-                           old_pen.width())
-            item.setPen(new_pen)
-
-        self.parent.scene.update()
+            effect = QGraphicsColorizeEffect()
+            effect.setColor(QColor(255, 0, 0))
+            effect.setStrength(0.5)
+            item.setGraphicsEffect(effect)
 
         # ask for confirmation
         retval = display_messagebox(
@@ -1838,8 +2099,7 @@ class CustomGraphicsView(QGraphicsView):
         )
         if retval != QMessageBox.Ok:
             for item in all_del_objects:
-                item.setBrush(all_del_objects_old_brushes.pop(0))
-                item.setPen(all_del_objects_old_pens.pop(0))
+                item.setGraphicsEffect(None)
             return
 
         for obj in all_del_objects:
@@ -1849,6 +2109,8 @@ class CustomGraphicsView(QGraphicsView):
             self.parent.members_in_view.pop(member_id)
         for line_key in del_inputs:
             self.parent.inputs_in_view.pop(line_key)
+        self.parent.simplify_view_cache = None
+        self.parent.invalidate_input_caches()
 
         self.parent.save_config()
         if hasattr(self.parent.parent, 'top_bar'):
@@ -1856,12 +2118,19 @@ class CustomGraphicsView(QGraphicsView):
 
     def mouse_is_over_member(self):
         mouse_scene_position = self.mapToScene(self.mapFromGlobal(QCursor.pos()))
-        for member_id, member in self.parent.members_in_view.items():
-            # We need to map the scene position to the member's local coordinates
-            member_local_pos = member.mapFromScene(mouse_scene_position)
-            if member.contains(member_local_pos):
-                return True
-        return False
+        # let the scene's index find the items under the mouse instead of testing every member
+        return any(isinstance(item, DraggableMember) for item in self.scene().items(mouse_scene_position))
+
+    def members_near(self, scene_pos, radius):
+        """Returns the members owning any item within radius of scene_pos, using the scene's index"""
+        search_rect = QRectF(scene_pos.x() - radius, scene_pos.y() - radius, radius * 2, radius * 2)
+        near_members = set()
+        for item in self.scene().items(search_rect, Qt.IntersectsItemBoundingRect):
+            if isinstance(item, ConnectionPoint):
+                item = item.parentItem()
+            if isinstance(item, DraggableMember):
+                near_members.add(item)
+        return near_members
 
     def mouseReleaseEvent(self, event):
         self._is_panning = False
@@ -1898,24 +2167,27 @@ class CustomGraphicsView(QGraphicsView):
                 else:
                     self.setDragMode(QGraphicsView.RubberBandDrag)
         mouse_scene_position = self.mapToScene(event.pos())
+        # connection points are hit within 20px, so only members with an item inside that range can match
+        near_members = self.members_near(mouse_scene_position, 25)
+        mouse_x, mouse_y = mouse_scene_position.x(), mouse_scene_position.y()
         for member_id, member in self.parent.members_in_view.items():
-            if isinstance(member, DraggableMember):
+            if member in near_members:
                 member_width = member.rect().width()
                 input_rad = int(member_width / 2.5)
                 if self.parent.adding_line:
                     input_point_pos = member.input_point.scenePos()
-                    # if within 20px
-                    if (mouse_scene_position - input_point_pos).manhattanLength() <= 20:
+                    # if within a 20px radius
+                    dx, dy = mouse_x - input_point_pos.x(), mouse_y - input_point_pos.y()
+                    if dx * dx + dy * dy <= 400:
                         self.parent.add_input(member_id)
                         return
                 else:
                     output_point_pos = member.output_point.scenePos()
-                    output_point_pos.setX(output_point_pos.x() + 2)
-                    x_diff_is_pos = (mouse_scene_position.x() - output_point_pos.x()) > 0
-                    if x_diff_is_pos:
+                    dx, dy = mouse_x - (output_point_pos.x() + 2), mouse_y - output_point_pos.y()
+                    if dx > 0:
                         input_rad = 20
-                    # if within 20px
-                    if (mouse_scene_position - output_point_pos).manhattanLength() <= input_rad:
+                    # if within the radius
+                    if dx * dx + dy * dy <= input_rad * input_rad:
                         self.parent.adding_line = ConnectionLine(self.parent, member)
                         self.parent.scene.addItem(self.parent.adding_line)
                         return
@@ -1925,24 +2197,19 @@ class CustomGraphicsView(QGraphicsView):
         super().mousePressEvent(event)
 
     def mouseMoveEvent(self, event):
-        update = False
-        mouse_point = self.mapToScene(event.pos())
-        if self.parent.adding_line:
-            self.parent.adding_line.updateEndPoint(mouse_point)
-            update = True
-        if self.parent.new_agents:
-            for pos, entity in self.parent.new_agents:
-                entity.setCentredPos(mouse_point + pos)
-            update = True
-        if self.parent.new_lines:
-            for new_line in self.parent.new_lines:
-                new_line.updatePath()
-            update = True
-
-        if update:
-            if self.scene():
-                self.scene().update()
-            self.update()
+        # moved items schedule their own repaints, so there's no need to update the whole scene
+        # skip sub 2px moves, some platforms deliver several move events per pixel
+        if self._last_move_pos is None or (event.pos() - self._last_move_pos).manhattanLength() >= 2:
+            self._last_move_pos = event.pos()
+            mouse_point = self.mapToScene(event.pos())
+            if self.parent.adding_line:
+                self.parent.adding_line.updateEndPoint(mouse_point)
+            if self.parent.new_agents:
+                for pos, entity in self.parent.new_agents:
+                    entity.setCentredPos(mouse_point + pos)
+            if self.parent.new_lines:
+                for new_line in self.parent.new_lines:
+                    new_line.updatePath()
 
         if self._is_panning:
             delta = event.pos() - self._mouse_press_pos
@@ -1988,7 +2255,6 @@ class InsertableMember(QGraphicsEllipseItem):
         self.member_config = config
         diameter = 50 if self.member_type != 'node' else 20
         super().__init__(0, 0, diameter, diameter)
-        from src.gui.style import TEXT_COLOR
 
         self.parent = parent
         member_type = config.get('_TYPE', 'agent')
@@ -2000,7 +2266,7 @@ class InsertableMember(QGraphicsEllipseItem):
         self.input_point.setPos(0, self.rect().height() / 2 - 2)
         self.output_point.setPos(self.rect().width() - 4, self.rect().height() / 2 - 2)
 
-        pen = QPen(QColor(TEXT_COLOR), 1)
+        pen = QPen(QColor(style.TEXT_COLOR), 1)
 
         if member_type in ['workflow', 'tool', 'block']:
             pen = None
@@ -2010,9 +2276,8 @@ class InsertableMember(QGraphicsEllipseItem):
         self.setCentredPos(pos)
 
     def refresh_avatar(self):
-        from src.gui.style import TEXT_COLOR
         if self.member_type == 'node':
-            self.setBrush(QBrush(QColor(TEXT_COLOR)))
+            self.setBrush(QBrush(QColor(style.TEXT_COLOR)))
             return
 
         hide_bubbles = self.config.get('group.hide_bubbles', False)
@@ -2020,11 +2285,9 @@ class InsertableMember(QGraphicsEllipseItem):
 
         avatar_paths = get_avatar_paths_from_config(self.config)
 
-        diameter = 50
-        pixmap = path_to_pixmap(avatar_paths, opacity=opacity, diameter=diameter)
-
-        if pixmap:
-            self.setBrush(QBrush(pixmap.scaled(diameter, diameter)))
+        brush = avatar_brush(avatar_paths, opacity=opacity, diameter=50)
+        if brush:
+            self.setBrush(brush)
 
     def setCentredPos(self, pos):
         self.setPos(pos.x() - self.rect().width() / 2, pos.y() - self.rect().height() / 2)
@@ -2043,7 +2306,6 @@ class DraggableMember(QGraphicsEllipseItem):
         self.member_config = member_config
         diameter = 50 if self.member_type != 'node' else 20
         super().__init__(0, 0, diameter, diameter)
-        from src.gui.style import TEXT_COLOR
 
         self.parent = parent
         self.id = member_id
@@ -2054,7 +2316,7 @@ class DraggableMember(QGraphicsEllipseItem):
             if block_type == 'Prompt':
                 pass
 
-        pen = QPen(QColor(TEXT_COLOR), 1)
+        pen = QPen(QColor(style.TEXT_COLOR), 1)
 
         if self.member_type in ['workflow', 'tool', 'block']:
             pen = None
@@ -2088,22 +2350,17 @@ class DraggableMember(QGraphicsEllipseItem):
         # }
 
     def refresh_avatar(self):
-        from src.gui.style import TEXT_COLOR
         if self.member_type == 'node':
-            self.setBrush(QBrush(QColor(TEXT_COLOR)))
+            self.setBrush(QBrush(QColor(style.TEXT_COLOR)))
             return
 
         hide_bubbles = self.member_config.get('group.hide_bubbles', False)
         opacity = 0.2 if hide_bubbles else 1
         avatar_paths = get_avatar_paths_from_config(self.member_config)
 
-        diameter = 50
-        pixmap = path_to_pixmap(avatar_paths, opacity=opacity, diameter=diameter)  # , def_avatar=def_avatar)
-
-        # if pixmap is not null
-        if pixmap:
-            self.setBrush(QBrush(pixmap.scaled(diameter, diameter)))
-        pass
+        brush = avatar_brush(avatar_paths, opacity=opacity, diameter=50)  # , def_avatar=def_avatar)
+        if brush:
+            self.setBrush(brush)
 
     def toggle_highlight(self, enable, color=None):
         """Toggles the visual highlight on or off."""
@@ -2129,12 +2386,18 @@ class DraggableMember(QGraphicsEllipseItem):
             return
 
         super().mouseMoveEvent(event)
-        for line in self.parent.inputs_in_view.values():
+        self.parent.simplify_view_cache = None  # member order may have changed
+        # only lines connected to the moved members need updating, the whole selection moves together
+        lines_by_member = self.parent.get_lines_by_member()
+        moved_lines = set(lines_by_member.get(self.id, []))
+        for item in self.scene().selectedItems():
+            if isinstance(item, DraggableMember):
+                moved_lines.update(lines_by_member.get(item.id, []))
+        for line in moved_lines:
             line.updatePosition()
 
         if self.member_type != 'node':
-            self.parent.load_async_groups()
-            self.parent.refresh_member_highlights()
+            self.parent.group_refresh_timer.start()  # once per event loop turn, not per move event
 
     def mouseReleaseEvent(self, event):  # this is faster
         super().mouseReleaseEvent(event)
@@ -2143,8 +2406,7 @@ class DraggableMember(QGraphicsEllipseItem):
     def save_pos(self):
         new_loc_x = max(0, int(self.x()))
         new_loc_y = max(0, int(self.y()))
-        members = self.parent.config.get('members', [])
-        member = next((m for m in members if m['id'] == self.id), None)
+        member = self.parent.member_configs_by_id.get(self.id)
         if member:
             if new_loc_x == member['loc_x'] and new_loc_y == member['loc_y']:
                 return
@@ -2152,7 +2414,7 @@ class DraggableMember(QGraphicsEllipseItem):
             (self.id, 'loc_x', new_loc_x),
             (self.id, 'loc_y', new_loc_y)
         ])
-        self.parent.save_config()
+        self.parent.queue_save_config()
 
     def hoverMoveEvent(self, event):
         # Check if the mouse is within 20 pixels of the output point
@@ -2173,41 +2435,107 @@ class DraggableMember(QGraphicsEllipseItem):
             self.outer_diameter = int(self.inner_diameter * 1.6)  # Diameter including the gradient
             self.use_color = None  # Uses text color when none
 
-        def boundingRect(self):
-            return QRectF(-self.outer_diameter / 2, -self.outer_diameter / 2, self.outer_diameter, self.outer_diameter)
-
-        def paint(self, painter, option, widget=None):
-            from src.gui.style import TEXT_COLOR
-            gradient = QRadialGradient(QPointF(0, 0), self.outer_diameter / 2)
-            # text_color_ = QColor(TEXT_COLOR)
-            color = self.use_color or QColor(TEXT_COLOR)
-            color.setAlpha(155)
-            gradient.setColorAt(0, color)  # Inner color of gradient
-            gradient.setColorAt(1, QColor(255, 255, 0, 0))  # Outer color of gradient
-
-            # Create a path for the outer ellipse (gradient)
+            # the ring geometry is fixed per member size, so subtract the hole once instead of on every paint
             outer_path = QPainterPath()
             outer_path.addEllipse(-self.outer_diameter / 2, -self.outer_diameter / 2, self.outer_diameter,
                                   self.outer_diameter)
-
-            # Create a path for the inner hole
             inner_path = QPainterPath()
             inner_path.addEllipse(-self.inner_diameter / 2, -self.inner_diameter / 2, self.inner_diameter,
                                   self.inner_diameter)
+            self.ring_path = outer_path.subtracted(inner_path)
+            self.ring_brushes = {}  # rgb of the highlight color: gradient brush
 
-            # Subtract the inner hole from the outer path
-            final_path = QPainterPath(outer_path)
-            final_path = final_path.subtracted(inner_path)
+        def boundingRect(self):
+            return QRectF(-self.outer_diameter / 2, -self.outer_diameter / 2, self.outer_diameter, self.outer_diameter)
 
-            painter.setBrush(QBrush(gradient))
+        def paint(self, painter, option, widget=None):
+            color = QColor(self.use_color or style.TEXT_COLOR)
+            brush = self.ring_brushes.get(color.rgb())
+            if brush is None:
+                gradient = QRadialGradient(QPointF(0, 0), self.outer_diameter / 2)
+                color.setAlpha(155)
+                gradient.setColorAt(0, color)  # Inner color of gradient
+                gradient.setColorAt(1, QColor(255, 255, 0, 0))  # Outer color of gradient
+                brush = self.ring_brushes[color.rgb()] = QBrush(gradient)
+
+            painter.setBrush(brush)
             painter.setPen(Qt.NoPen)  # No border
-            painter.drawPath(final_path)
+            painter.drawPath(self.ring_path)
+
+
+def build_looper_path(start_point, end_point, sx, sy, ex, ey):
+    """Returns the path and midpoint of a looper line, sx, sy, ex, ey are the coordinates of the end points"""
+    line_is_under = sy >= ey
+    if (line_is_under and sy > ey) or (sy < ey and not line_is_under):
+        extender_side = 'left'
+    else:
+        extender_side = 'right'
+    y_diff = abs(sy - ey)
+    if not line_is_under:
+        y_diff = -y_diff
+
+    path = QPainterPath(start_point)
+
+    x_rad = 25
+    y_rad = 25 if line_is_under else -25
+    right_x = sx + x_rad
+
+    # Draw half of the right side of the loop
+    cp1 = QPointF(right_x, sy)
+    cp2 = QPointF(right_x, sy + y_rad)
+    path.cubicTo(cp1, cp2, QPointF(right_x, sy + y_rad))
+
+    if extender_side == 'right':
+        # Draw a vertical line
+        path.lineTo(QPointF(right_x, sy + y_rad + y_diff))
+
+    # Draw the other half of the right hand side loop
+    var = y_diff if extender_side == 'right' else 0
+    mid_y = sy + y_rad + var
+    bottom_y = mid_y + y_rad
+    cp3 = QPointF(right_x, bottom_y)
+    cp4 = QPointF(sx, bottom_y)
+    path.cubicTo(cp3, cp4, QPointF(sx, bottom_y))
+
+    # Draw the horizontal line
+    x_diff = sx - ex
+    if x_diff < 50:
+        x_diff = 50
+    path.lineTo(QPointF(sx - x_diff, bottom_y))
+    midpoint = QPointF(sx - (x_diff / 2), bottom_y)
+
+    # Draw half of the left side of the loop
+    left_x = sx - x_diff - x_rad
+    line_to = QPointF(left_x, mid_y)
+    cp5 = QPointF(left_x, bottom_y)
+    cp6 = line_to  # cp5 is off the chord, so this is a rounded corner rather than a straight segment
+    path.cubicTo(cp5, cp6, line_to)
+
+    if extender_side == 'left':
+        # Draw the vertical line up y_diff pixels
+        line_y = sy + y_rad - y_diff
+    else:
+        # Draw the vertical line down y_diff pixels
+        line_y = sy + y_rad + y_diff
+    path.lineTo(QPointF(left_x, line_y))
+
+    # Draw the other half of the left hand side loop
+    diag_pt_top_right = QPointF(left_x + x_rad, line_y - y_rad)
+    cp7 = QPointF(left_x, line_y)
+    cp8 = QPointF(left_x, line_y - y_rad)
+    path.cubicTo(cp7, cp8, diag_pt_top_right)
+
+    # Draw line to the end point
+    path.lineTo(end_point)
+
+    return path, midpoint
 
 
 class InsertableLine(QGraphicsPathItem):
+    _stroker = None  # shared by all lines, the stroke width never changes
+
     def __init__(self, parent, member_bundle, source_member_index, member_index, config=None):
         super().__init__()
-        from src.gui.style import TEXT_COLOR
         self.parent = parent
         self.member_bundle = member_bundle.copy()
 
@@ -2219,15 +2547,20 @@ class InsertableLine(QGraphicsPathItem):
 
         self.selection_path = None
         self.looper_midpoint = None
+        self.looper_polygon = None
+        self.path_key = None  # the inputs the current path was built from
+        self.bounding_rect = None  # the padded path rect, reset whenever the path changes
 
         self.config: Dict[str, Any] = config if config else {}
 
         self.setAcceptHoverEvents(True)
-        self.color = QColor(TEXT_COLOR)
+        self.color = QColor(style.TEXT_COLOR)
+        self.color_brush = QBrush(self.color)
 
         self.updatePath()
 
         self.setPen(QPen(self.color, 2, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+        self.bounding_rect = None  # the pen width is part of the path rect
         self.setZValue(-1)
 
     def paint(self, painter, option, widget):
@@ -2242,13 +2575,15 @@ class InsertableLine(QGraphicsPathItem):
         painter.drawPath(self.path())
 
         # # make it an opaque triangle
-        if self.looper_midpoint:
-            painter.setBrush(QBrush(self.color))
-            painter.drawPolygon(QPolygonF([self.looper_midpoint, self.looper_midpoint + QPointF(10, 5), self.looper_midpoint + QPointF(10, -5)]))
+        if self.looper_polygon is not None:
+            painter.setBrush(self.color_brush)
+            painter.drawPolygon(self.looper_polygon)
 
     def updatePosition(self):
-        self.updatePath()
-        self.scene().update(self.scene().sceneRect())
+        path_key = self.path_key
+        self.updatePath()  # setPath schedules the repaint of the old and new regions
+        if self.path_key is path_key:
+            self.update()  # the path is unchanged, but the config it's painted with may not be
 
     def updatePath(self):
         start_point = self.start_point.scenePos() if isinstance(self.start_point, ConnectionPoint) else self.start_point
@@ -2260,69 +2595,16 @@ class InsertableLine(QGraphicsPathItem):
 
         is_looper = self.config.get('looper', False)
 
-        if is_looper:
-            line_is_under = start_point.y() >= end_point.y()
-            if (line_is_under and start_point.y() > end_point.y()) or (start_point.y() < end_point.y() and not line_is_under):
-                extender_side = 'left'
-            else:
-                extender_side = 'right'
-            y_diff = abs(start_point.y() - end_point.y())
-            if not line_is_under:
-                y_diff = -y_diff
-
-            path = QPainterPath(start_point)
+        # the path only depends on the end points and looper flag, skip rebuilding it when they're unchanged
+        sx, sy = start_point.x(), start_point.y()
+        ex, ey = end_point.x(), end_point.y()
+        path_key = (sx, sy, ex, ey, is_looper)
+        if path_key == self.path_key:
+            return
+        self.path_key = path_key
 
-            x_rad = 25
-            y_rad = 25 if line_is_under else -25
-
-            # Draw half of the right side of the loop
-            cp1 = QPointF(start_point.x() + x_rad, start_point.y())
-            cp2 = QPointF(start_point.x() + x_rad, start_point.y() + y_rad)
-            path.cubicTo(cp1, cp2, QPointF(start_point.x() + x_rad, start_point.y() + y_rad))
-
-            if extender_side == 'right':
-                # Draw a vertical line
-                path.lineTo(QPointF(start_point.x() + x_rad, start_point.y() + y_rad + y_diff))
-
-            # Draw the other half of the right hand side loop
-            var = y_diff if extender_side == 'right' else 0
-            cp3 = QPointF(start_point.x() + x_rad, start_point.y() + y_rad + var + y_rad)
-            cp4 = QPointF(start_point.x(), start_point.y() + y_rad + var + y_rad)
-            path.cubicTo(cp3, cp4, QPointF(start_point.x(), start_point.y() + y_rad + var + y_rad))
-
-            # Draw the horizontal line
-            x_diff = start_point.x() - end_point.x()
-            if x_diff < 50:
-                x_diff = 50
-            path.lineTo(QPointF(start_point.x() - x_diff, start_point.y() + y_rad + var + y_rad))
-            self.looper_midpoint = QPointF(start_point.x() - (x_diff / 2), start_point.y() + y_rad + var + y_rad)
-
-            # Draw half of the left side of the loop
-            line_to = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad + var)
-            cp5 = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad + var + y_rad)
-            cp6 = line_to
-            path.cubicTo(cp5, cp6, line_to)
-
-            if extender_side == 'left':
-                # Draw the vertical line up y_diff pixels
-                line_to = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad - y_diff)
-                path.lineTo(line_to)
-            else:
-                # Draw the vertical line down y_diff pixels
-                line_to = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad + y_diff)
-                path.lineTo(line_to)
-
-            # Draw the other half of the left hand side loop
-            # cp7 = QPointF(start_point.x() - x_diff - 25, start_point.y() + 25 - y_diff - 25)
-            # cp8 = QPointF(start_point.x(), start_point.y() + 25 - y_diff - 25)
-            diag_pt_top_right = QPointF(line_to.x() + x_rad, line_to.y() - y_rad)
-            # diag_pt_top_right = line_to + QPointF(25, 25 * (-1 if line_is_under else 1))
-            cp7 = QPointF(diag_pt_top_right.x() - x_rad, diag_pt_top_right.y() + y_rad)
-            cp8 = QPointF(diag_pt_top_right.x() - x_rad, diag_pt_top_right.y())
-            path.cubicTo(cp7, cp8, diag_pt_top_right)
-
-            # Draw line to the end point
-            path.lineTo(end_point)
+        if is_looper:
+            path, self.looper_midpoint = build_looper_path(start_point, end_point, sx, sy, ex, ey)
         else:
             x_distance = (end_point - start_point).x()
             y_distance = abs((end_point - start_point).y())
@@ -2339,30 +2621,53 @@ class InsertableLine(QGraphicsPathItem):
             offset = abs(offset)  # max(abs(offset), 10)
 
             path = QPainterPath(start_point)
-            ctrl_point1 = start_point + QPointF(offset, 0)
-            ctrl_point2 = end_point - QPointF(offset, 0)
-            path.cubicTo(ctrl_point1, ctrl_point2, end_point)
+            if y_distance < 2 and x_distance > 0:
+                # the offset is capped at y_distance here, so the curve is indistinguishable from a line
+                path.lineTo(end_point)
+            else:
+                ctrl_point1 = start_point + QPointF(offset, 0)
+                ctrl_point2 = end_point - QPointF(offset, 0)
+                path.cubicTo(ctrl_point1, ctrl_point2, end_point)
             self.looper_midpoint = None
 
+        # the looper triangle only moves with the path, so build it here instead of on every paint
+        self.looper_polygon = QPolygonF([
+            self.looper_midpoint,
+            self.looper_midpoint + QPointF(10, 5),
+            self.looper_midpoint + QPointF(10, -5),
+        ]) if self.looper_midpoint else None
+
+        self.bounding_rect = None  # setPath repaints the old region from the previous path's rect
         self.setPath(path)
-        self.updateSelectionPath()
+        self.bounding_rect = None
+        self.selection_path = None  # stroked on the next hit test, not on every move
 
     def updateSelectionPath(self):
-        stroker = QPainterPathStroker()
-        stroker.setWidth(20)
-        self.selection_path = stroker.createStroke(self.path())
+        if InsertableLine._stroker is None:
+            InsertableLine._stroker = QPainterPathStroker()
+            InsertableLine._stroker.setWidth(20)
+        self.selection_path = InsertableLine._stroker.createStroke(self.path())
 
     def shape(self):
         if self.selection_path is None:
-            return super().shape()
+            if self.path().isEmpty():
+                return super().shape()
+            self.updateSelectionPath()
         return self.selection_path
 
+    def boundingRect(self):
+        # include the looper triangle and the selection stroke, so path changes repaint only this region
+        if self.bounding_rect is None:
+            self.bounding_rect = super().boundingRect().adjusted(-10, -10, 10, 10)
+        return self.bounding_rect
+
 
 
 class ConnectionLine(QGraphicsPathItem):  # todo dupe code above
+    _stroker = None  # shared by all lines, the stroke width never changes
+
     def __init__(self, parent, source_member, target_member=None, config=None):
         super().__init__()
-        from src.gui.style import TEXT_COLOR
         self.parent = parent
         self.source_member_id = source_member.id
         self.target_member_id = target_member.id if target_member else None
@@ -2370,17 +2675,28 @@ class ConnectionLine(QGraphicsPathItem):  # todo dupe code above
         self.end_point = target_member.input_point if target_member else None
         self.selection_path = None
         self.looper_midpoint = None
+        self.looper_polygon = None
+        self.path_key = None  # the inputs the current path was built from
+        self.bounding_rect = None  # the padded path rect, reset whenever the path changes
+        self.input_point_positions = None  # (x, y, member_id, scene pos) while drawing a new line
+        self.circular_checks = {}  # target member_id: bool, while drawing a new line
+        self.gradient = None
+        self.gradient_key = None  # the path, mappings and theme colors the gradient was built for
 
         self.config: Dict[str, Any] = config if config else {}
 
         self.setAcceptHoverEvents(True)
         self.setFlag(QGraphicsItem.ItemIsSelectable)
-        self.color = QColor(TEXT_COLOR)
+        self.color = QColor(style.TEXT_COLOR)
+        self.color_brush = QBrush(self.color)
 
         self.updatePath()
 
         self.setPen(QPen(self.color, 2, Qt.SolidLine, Qt.RoundCap, Qt.RoundJoin))
+        self.bounding_rect = None  # the pen width is part of the path rect
         self.setZValue(-1)
+        # rasterized once and blitted when panning, setPath and selection changes still repaint it
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
 
     def paint(self, painter, option, widget):
         line_width = 4 if self.isSelected() else 2
@@ -2395,77 +2711,90 @@ class ConnectionLine(QGraphicsPathItem):  # todo dupe code above
             painter.setPen(current_pen)
             painter.drawPath(self.path())
         else:
-            from src.gui.style import TEXT_COLOR, PARAM_COLOR, STRUCTURE_COLOR
-            color_codes = {
-                "Output": QColor(TEXT_COLOR),  # White
-                "Message": QColor(TEXT_COLOR),  # White
-                "Param": QColor(PARAM_COLOR),  # Blue
-                "Structure": QColor(STRUCTURE_COLOR)  # Green
-            }
-                # 'Loaded': '#6aab73',
-                # 'Unloaded': '#B94343',
-                # 'Modified': '#438BB9',
-                # 'Error': '#B94343',
-                # 'Externally Modified': '#B94343',
-
-            start_point = self.path().pointAtPercent(0)
-            end_point = self.path().pointAtPercent(1)
-
-            gradient = QLinearGradient(start_point, end_point)
-
-            source_colors = []
-            target_colors = []
-
-            for mapping in mappings_data:
-                source_color = color_codes.get(mapping['source'], QColor(TEXT_COLOR))
-                target_color = color_codes.get(mapping['target'], QColor(TEXT_COLOR))
-                if source_color not in source_colors:
-                    source_colors.append(source_color)
-                if target_color not in target_colors:
-                    target_colors.append(target_color)
-
-            dash_length = 10
-            total_length = self.path().length()
-            num_dashes = int(total_length / dash_length)
-
-            if len(source_colors) > 1 and len(target_colors) == 1:
-                # Multiple sources, single target
-                target_color = target_colors[0]
-                for i in range(num_dashes):
-                    t1 = i / num_dashes
-                    t2 = (i + 1) / num_dashes
-
-                    source_color = source_colors[i % len(source_colors)]
-
-                    gradient.setColorAt(t1, source_color)
-                    gradient.setColorAt(t2, self.blend_colors(source_color, target_color, 0.5))
-            elif len(source_colors) > 1 or len(target_colors) > 1:
-                # Multiple sources and multiple targets, or single source and multiple targets
-                for i in range(num_dashes):
-                    t1 = i / num_dashes
-                    t2 = (i + 1) / num_dashes
-
-                    source_color = source_colors[i % len(source_colors)]
-                    target_color = target_colors[i % len(target_colors)]
-
-                    gradient.setColorAt(t1, source_color)
-                    gradient.setColorAt(t2, target_color)
-            else:
-                # Simple gradient from single source to single target
-                source_color = source_colors[0] if source_colors else QColor(255, 255, 255)
-                target_color = target_colors[0] if target_colors else QColor(255, 255, 255)
-                gradient.setColorAt(0, source_color)
-                gradient.setColorAt(1, target_color)
+            # the gradient only changes with the path, the mappings or the theme, so reuse it between paints
+            gradient_key = (
+                self.path_key,
+                tuple((mapping['source'], mapping['target']) for mapping in mappings_data),
+                style.TEXT_COLOR,
+                style.PARAM_COLOR,
+                style.STRUCTURE_COLOR,
+            )
+            if gradient_key != self.gradient_key:
+                self.gradient = self.build_gradient(mappings_data)
+                self.gradient_key = gradient_key
 
-            current_pen.setBrush(gradient)
+            current_pen.setBrush(self.gradient)
             painter.setPen(current_pen)
             painter.drawPath(self.path())
 
         # Draw the looper triangle
-        if self.looper_midpoint:
-            painter.setBrush(QBrush(self.color))
-            painter.drawPolygon(QPolygonF(
-                [self.looper_midpoint, self.looper_midpoint + QPointF(10, 5), self.looper_midpoint + QPointF(10, -5)]))
+        if self.looper_polygon is not None:
+            painter.setBrush(self.color_brush)
+            painter.drawPolygon(self.looper_polygon)
+
+    def build_gradient(self, mappings_data):
+        color_codes = {
+            "Output": QColor(style.TEXT_COLOR),  # White
+            "Message": QColor(style.TEXT_COLOR),  # White
+            "Param": QColor(style.PARAM_COLOR),  # Blue
+            "Structure": QColor(style.STRUCTURE_COLOR)  # Green
+        }
+            # 'Loaded': '#6aab73',
+            # 'Unloaded': '#B94343',
+            # 'Modified': '#438BB9',
+            # 'Error': '#B94343',
+            # 'Externally Modified': '#B94343',
+
+        start_point = self.path().pointAtPercent(0)
+        end_point = self.path().pointAtPercent(1)
+
+        gradient = QLinearGradient(start_point, end_point)
+
+        source_colors = []
+        target_colors = []
+
+        for mapping in mappings_data:
+            source_color = color_codes.get(mapping['source'], QColor(style.TEXT_COLOR))
+            target_color = color_codes.get(mapping['target'], QColor(style.TEXT_COLOR))
+            if source_color not in source_colors:
+                source_colors.append(source_color)
+            if target_color not in target_colors:
+                target_colors.append(target_color)
+
+        dash_length = 10
+        total_length = self.path().length()
+        num_dashes = int(total_length / dash_length)
+
+        if len(source_colors) > 1 and len(target_colors) == 1:
+            # Multiple sources, single target
+            target_color = target_colors[0]
+            for i in range(num_dashes):
+                t1 = i / num_dashes
+                t2 = (i + 1) / num_dashes
+
+                source_color = source_colors[i % len(source_colors)]
+
+                gradient.setColorAt(t1, source_color)
+                gradient.setColorAt(t2, self.blend_colors(source_color, target_color, 0.5))
+        elif len(source_colors) > 1 or len(target_colors) > 1:
+            # Multiple sources and multiple targets, or single source and multiple targets
+            for i in range(num_dashes):
+                t1 = i / num_dashes
+                t2 = (i + 1) / num_dashes
+
+                source_color = source_colors[i % len(source_colors)]
+                target_color = target_colors[i % len(target_colors)]
+
+                gradient.setColorAt(t1, source_color)
+                gradient.setColorAt(t2, target_color)
+        else:
+            # Simple gradient from single source to single target
+            source_color = source_colors[0] if source_colors else QColor(255, 255, 255)
+            target_color = target_colors[0] if target_colors else QColor(255, 255, 255)
+            gradient.setColorAt(0, source_color)
+            gradient.setColorAt(1, target_color)
+
+        return gradient
 
     @staticmethod
     def blend_colors(color1, color2, ratio):
@@ -2492,15 +2821,23 @@ class ConnectionLine(QGraphicsPathItem):  # todo dupe code above
     #         painter.drawPolygon(QPolygonF([self.looper_midpoint, self.looper_midpoint + QPointF(10, 5), self.looper_midpoint + QPointF(10, -5)]))
 
     def updateEndPoint(self, end_point):
+        # members can't move while a line is being drawn, so read their input points once per line,
+        # as plain coordinates so the search below doesn't create a QPointF per member per move
+        if self.input_point_positions is None:
+            self.input_point_positions = []
+            for member_id, member in self.parent.members_in_view.items():
+                if member_id == self.source_member_id:
+                    continue
+                point = member.input_point.scenePos()
+                self.input_point_positions.append((point.x(), point.y(), member_id, point))
+
         # find the closest start point
         closest_member_id = None
         closest_start_point = None
         closest_distance = 1000
-        for member_id, member in self.parent.members_in_view.items():
-            if member_id == self.source_member_id:
-                continue
-            start_point = member.input_point.scenePos()
-            distance = (start_point - end_point).manhattanLength()
+        end_x, end_y = end_point.x(), end_point.y()
+        for x, y, member_id, start_point in self.input_point_positions:
+            distance = abs(x - end_x) + abs(y - end_y)
             if distance < closest_distance:
                 closest_distance = distance
                 closest_start_point = start_point
@@ -2508,16 +2845,19 @@ class ConnectionLine(QGraphicsPathItem):  # todo dupe code above
 
         if closest_distance < 20:
             self.end_point = closest_start_point
-            cr_check = self.parent.check_for_circular_references(closest_member_id, [self.source_member_id])
-            self.config['looper'] = True if cr_check else False
+            if closest_member_id not in self.circular_checks:
+                self.circular_checks[closest_member_id] = self.parent.check_for_circular_references(closest_member_id, [self.source_member_id])
+            self.config['looper'] = self.circular_checks[closest_member_id]
         else:
             self.end_point = end_point
             self.config['looper'] = False
         self.updatePath()
 
     def updatePosition(self):
-        self.updatePath()
-        self.scene().update(self.scene().sceneRect())
+        path_key = self.path_key
+        self.updatePath()  # setPath schedules the repaint of the old and new regions
+        if self.path_key is path_key:
+            self.update()  # the path is unchanged, but the config it's painted with may not be
 
     def updatePath(self):
         if self.end_point is None:
@@ -2531,69 +2871,16 @@ class ConnectionLine(QGraphicsPathItem):  # todo dupe code above
 
         is_looper = self.config.get('looper', False)
 
-        if is_looper:
-            line_is_under = start_point.y() >= end_point.y()
-            if (line_is_under and start_point.y() > end_point.y()) or (start_point.y() < end_point.y() and not line_is_under):
-                extender_side = 'left'
-            else:
-                extender_side = 'right'
-            y_diff = abs(start_point.y() - end_point.y())
-            if not line_is_under:
-                y_diff = -y_diff
-
-            path = QPainterPath(start_point)
+        # the path only depends on the end points and looper flag, skip rebuilding it when they're unchanged
+        sx, sy = start_point.x(), start_point.y()
+        ex, ey = end_point.x(), end_point.y()
+        path_key = (sx, sy, ex, ey, is_looper)
+        if path_key == self.path_key:
+            return
+        self.path_key = path_key
 
-            x_rad = 25
-            y_rad = 25 if line_is_under else -25
-
-            # Draw half of the right side of the loop
-            cp1 = QPointF(start_point.x() + x_rad, start_point.y())
-            cp2 = QPointF(start_point.x() + x_rad, start_point.y() + y_rad)
-            path.cubicTo(cp1, cp2, QPointF(start_point.x() + x_rad, start_point.y() + y_rad))
-
-            if extender_side == 'right':
-                # Draw a vertical line
-                path.lineTo(QPointF(start_point.x() + x_rad, start_point.y() + y_rad + y_diff))
-
-            # Draw the other half of the right hand side loop
-            var = y_diff if extender_side == 'right' else 0
-            cp3 = QPointF(start_point.x() + x_rad, start_point.y() + y_rad + var + y_rad)
-            cp4 = QPointF(start_point.x(), start_point.y() + y_rad + var + y_rad)
-            path.cubicTo(cp3, cp4, QPointF(start_point.x(), start_point.y() + y_rad + var + y_rad))
-
-            # Draw the horizontal line
-            x_diff = start_point.x() - end_point.x()
-            if x_diff < 50:
-                x_diff = 50
-            path.lineTo(QPointF(start_point.x() - x_diff, start_point.y() + y_rad + var + y_rad))
-            self.looper_midpoint = QPointF(start_point.x() - (x_diff / 2), start_point.y() + y_rad + var + y_rad)
-
-            # Draw half of the left side of the loop
-            line_to = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad + var)
-            cp5 = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad + var + y_rad)
-            cp6 = line_to
-            path.cubicTo(cp5, cp6, line_to)
-
-            if extender_side == 'left':
-                # Draw the vertical line up y_diff pixels
-                line_to = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad - y_diff)
-                path.lineTo(line_to)
-            else:
-                # Draw the vertical line down y_diff pixels
-                line_to = QPointF(start_point.x() - x_diff - x_rad, start_point.y() + y_rad + y_diff)
-                path.lineTo(line_to)
-
-            # Draw the other half of the left hand side loop
-            # cp7 = QPointF(start_point.x() - x_diff - 25, start_point.y() + 25 - y_diff - 25)
-            # cp8 = QPointF(start_point.x(), start_point.y() + 25 - y_diff - 25)
-            diag_pt_top_right = QPointF(line_to.x() + x_rad, line_to.y() - y_rad)
-            # diag_pt_top_right = line_to + QPointF(25, 25 * (-1 if line_is_under else 1))
-            cp7 = QPointF(diag_pt_top_right.x() - x_rad, diag_pt_top_right.y() + y_rad)
-            cp8 = QPointF(diag_pt_top_right.x() - x_rad, diag_pt_top_right.y())
-            path.cubicTo(cp7, cp8, diag_pt_top_right)
-
-            # Draw line to the end point
-            path.lineTo(end_point)
+        if is_looper:
+            path, self.looper_midpoint = build_looper_path(start_point, end_point, sx, sy, ex, ey)
         else:
             x_distance = (end_point - start_point).x()
             y_distance = abs((end_point - start_point).y())
@@ -2610,24 +2897,46 @@ class ConnectionLine(QGraphicsPathItem):  # todo dupe code above
             offset = abs(offset)  # max(abs(offset), 10)
 
             path = QPainterPath(start_point)
-            ctrl_point1 = start_point + QPointF(offset, 0)
-            ctrl_point2 = end_point - QPointF(offset, 0)
-            path.cubicTo(ctrl_point1, ctrl_point2, end_point)
+            if y_distance < 2 and x_distance > 0:
+                # the offset is capped at y_distance here, so the curve is indistinguishable from a line
+                path.lineTo(end_point)
+            else:
+                ctrl_point1 = start_point + QPointF(offset, 0)
+                ctrl_point2 = end_point - QPointF(offset, 0)
+                path.cubicTo(ctrl_point1, ctrl_point2, end_point)
             self.looper_midpoint = None
 
+        # the looper triangle only moves with the path, so build it here instead of on every paint
+        self.looper_polygon = QPolygonF([
+            self.looper_midpoint,
+            self.looper_midpoint + QPointF(10, 5),
+            self.looper_midpoint + QPointF(10, -5),
+        ]) if self.looper_midpoint else None
+
+        self.bounding_rect = None  # setPath repaints the old region from the previous path's rect
         self.setPath(path)
-        self.updateSelectionPath()
+        self.bounding_rect = None
+        self.selection_path = None  # stroked on the next hit test, not on every move
 
     def updateSelectionPath(self):
-        stroker = QPainterPathStroker()
-        stroker.setWidth(20)
-        self.selection_path = stroker.createStroke(self.path())
+        if ConnectionLine._stroker is None:
+            ConnectionLine._stroker = QPainterPathStroker()
+            ConnectionLine._stroker.setWidth(20)
+        self.selection_path = ConnectionLine._stroker.createStroke(self.path())
 
     def shape(self):
         if self.selection_path is None:
-            return super().shape()
+            if self.path().isEmpty():
+                return super().shape()
+            self.updateSelectionPath()
         return self.selection_path
 
+    def boundingRect(self):
+        # include the looper triangle and the selection stroke, so path changes repaint only this region
+        if self.bounding_rect is None:
+            self.bounding_rect = super().boundingRect().adjusted(-10, -10, 10, 10)
+        return self.bounding_rect
+
 
 class ConnectionPoint(QGraphicsEllipseItem):
     def __init__(self, parent, is_input):
@@ -2643,11 +2952,16 @@ class ConnectionPoint(QGraphicsEllipseItem):
             self.setBrush(QBrush(Qt.darkGray))
 
     def contains(self, point):
-        distance = (point - self.rect().center()).manhattanLength()
-        return distance <= 12
+        center = self.rect().center()
+        dx = point.x() - center.x()
+        dy = point.y() - center.y()
+        return dx * dx + dy * dy <= 144  # within a 12px radius
 
 
 class RoundedRectWidget(QGraphicsWidget):
+    _brush = None
+    _brush_color = None  # the theme text color _brush was built from
+
     def __init__(self, parent, points, member_ids, rounding_radius=25):
         super().__init__()
         self.parent = parent
@@ -2655,19 +2969,19 @@ class RoundedRectWidget(QGraphicsWidget):
 
         self.rounding_radius = rounding_radius
         self.setZValue(-2)
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)  # static, boxes are rebuilt when members move
 
         # points is a list of QPointF points, all must be within the bounds
-        lowest_x = min([point.x() for point in points])
-        lowest_y = min([point.y() for point in points])
+        # read each coordinate once, then reduce the plain floats
+        x_values = [point.x() for point in points]
+        y_values = [point.y() for point in points]
+        lowest_x, highest_x = min(x_values), max(x_values)
+        lowest_y, highest_y = min(y_values), max(y_values)
         btm_left = QPointF(lowest_x, lowest_y)
 
-        highest_x = max([point.x() for point in points])
-        highest_y = max([point.y() for point in points])
-        top_right = QPointF(highest_x, highest_y)
-
-        # Calculate width and height from l_bound and u_bound
-        width = abs(btm_left.x() - top_right.x()) + 50
-        height = abs(btm_left.y() - top_right.y()) + 50
+        # Calculate width and height from the bounds, the highest values are never below the lowest
+        width = highest_x - lowest_x + 50
+        height = highest_y - lowest_y + 50
 
         # Set size policy and preferred size
         self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
@@ -2680,14 +2994,16 @@ class RoundedRectWidget(QGraphicsWidget):
         return QRectF(0, 0, self.preferredWidth(), self.preferredHeight())
 
     def paint(self, painter, option, widget):
-        from src.gui.style import TEXT_COLOR
         rect = self.boundingRect()
         painter.setRenderHint(QPainter.Antialiasing)
 
-        # Set brush with 20% opacity color
-        color = QColor(TEXT_COLOR)
-        color.setAlpha(50)
-        painter.setBrush(QBrush(color))
+        # Set brush with 20% opacity color, shared by all boxes until the theme changes
+        if RoundedRectWidget._brush_color != style.TEXT_COLOR:
+            color = QColor(style.TEXT_COLOR)
+            color.setAlpha(50)
+            RoundedRectWidget._brush = QBrush(color)
+            RoundedRectWidget._brush_color = style.TEXT_COLOR
+        painter.setBrush(RoundedRectWidget._brush)
 
         painter.setPen(Qt.NoPen)
         painter.drawRoundedRect(rect, self.rounding_radius, self.rounding_radius)
@@ -2696,87 +3012,79 @@ class RoundedRectWidget(QGraphicsWidget):
 class DynamicMemberConfigWidget(ConfigWidget):
     def __init__(self, parent):
         super().__init__(parent=parent)
-        from src.system.plugins import get_plugin_agent_settings, get_plugin_block_settings
         self.parent = parent
         self.layout = CVBoxLayout(self)
         self.stacked_layout = QStackedLayout()
         self.layout.addLayout(self.stacked_layout)
 
         self.empty_widget = self.EmptySettings(parent)  # parent=parent)
-        self.agent_settings = get_plugin_agent_settings(None)(parent)
-        self.user_settings = self.UserMemberSettings(parent)
-        self.workflow_settings = None
-        self.block_settings = get_plugin_block_settings(None)(parent)
-        self.input_settings = self.InputSettings(parent)
-
-        self.user_settings.build_schema()
-        self.agent_settings.build_schema()
-        self.block_settings.build_schema()
-        self.input_settings.build_schema()
-
         self.stacked_layout.addWidget(self.empty_widget)
-        self.stacked_layout.addWidget(self.agent_settings)
-        self.stacked_layout.addWidget(self.user_settings)
-        self.stacked_layout.addWidget(self.input_settings)
-        self.stacked_layout.addWidget(self.block_settings)
-
-    def load(self, temp_only_config=False):
-        pass
 
-    def display_config_for_member(self, member):
-        from src.system.plugins import get_plugin_agent_settings, get_plugin_block_settings
-
-        # if member is None:
-        #     self.stacked_layout.setCurrentWidget(self.empty_widget)
-        #     return
-
-        member_type = member.member_type
-        member_config = member.member_config
-
-        type_widgets = {
-            'agent': 'agent_settings',
-            'user': 'user_settings',
-            'block': 'block_settings',
-            'workflow': 'workflow_settings',
-            'node': 'empty_widget',
+        # the settings widgets are built the first time a member of their type is displayed
+        self.agent_settings = None
+        self.user_settings = None
+        self.workflow_settings = None
+        self.block_settings = None
+        self.input_settings = None
+        self.plugin_widgets = {}  # (widget_name, plugin): settings widget
+        self.settings_classes = {  # the pluggable agent and block settings are built in load_pluggable_member_config
+            'user_settings': self.UserMemberSettings,
+            'input_settings': self.InputSettings,
         }
-        type_pluggable_classes = {
-            'agent': get_plugin_agent_settings,
-            'block': get_plugin_block_settings,
+        self.member_type_handlers = {
+            'agent': self.display_agent_member,
+            'user': self.display_user_member,
+            'block': self.display_block_member,
+            'workflow': self.display_workflow_member,
+            'node': self.display_node_member,
         }
-        widget_name = type_widgets[member_type]
-
-        if member_type == "workflow":
-            # added_tmp = False
-            if self.workflow_settings is None:
-                self.workflow_settings = self.WorkflowMemberSettings(self.parent)
-                # added_tmp = True
-                self.stacked_layout.addWidget(self.workflow_settings)
-            self.workflow_settings.member_id = member.id
-            self.workflow_settings.load_config(member_config)
-            self.workflow_settings.load()
-
-            # if added_tmp:
-            #     self.stacked_layout.addWidget(self.workflow_settings)
-            self.stacked_layout.setCurrentWidget(self.workflow_settings)
-            self.workflow_settings.reposition_view()
-            # QTimer.singleShot(100, lambda: self.reposition)  # not needed
-            return
 
-        elif member_type in type_pluggable_classes:
-            class_func = type_pluggable_classes[member_type]
-            if member_type == "agent":
-                plugin_field = member_config.get('info.use_plugin', '')
-            else:  # if member_type == "block":
-                plugin_field = member_config.get('block_type', '')
-            self.load_pluggable_member_config(widget_name, plugin_field, member, class_func)
+    def get_settings_widget(self, widget_name):
+        widget = getattr(self, widget_name)
+        if widget is None:
+            widget = self.settings_classes[widget_name](self.parent)
+            widget.build_schema()
+            self.stacked_layout.addWidget(widget)
+            setattr(self, widget_name, widget)
+        return widget
 
-        elif member_type == 'node':
-            self.stacked_layout.setCurrentWidget(self.empty_widget)
-            return
-        # else:
+    def load(self, temp_only_config=False):
+        pass
 
-        member_widget = getattr(self, widget_name)
+    def display_config_for_member(self, member):
+        self.member_type_handlers[member.member_type](member)
+
+    def display_workflow_member(self, member):
+        if self.workflow_settings is None:
+            self.workflow_settings = self.WorkflowMemberSettings(self.parent)
+            self.stacked_layout.addWidget(self.workflow_settings)
+        self.workflow_settings.member_id = member.id
+        self.workflow_settings.load_config(member.member_config)
+        self.workflow_settings.load()
+
+        self.stacked_layout.setCurrentWidget(self.workflow_settings)
+        self.workflow_settings.reposition_view()
+
+    def display_agent_member(self, member):
+        from src.system.plugins import get_plugin_agent_settings
+        plugin_field = member.member_config.get('info.use_plugin', '')
+        self.load_pluggable_member_config('agent_settings', plugin_field, member, get_plugin_agent_settings)
+        self.display_member_widget('agent_settings', member)
+
+    def display_block_member(self, member):
+        from src.system.plugins import get_plugin_block_settings
+        plugin_field = member.member_config.get('block_type', '')
+        self.load_pluggable_member_config('block_settings', plugin_field, member, get_plugin_block_settings)
+        self.display_member_widget('block_settings', member)
+
+    def display_user_member(self, member):
+        self.display_member_widget('user_settings', member)
+
+    def display_node_member(self, member):
+        self.stacked_layout.setCurrentWidget(self.empty_widget)
+
+    def display_member_widget(self, widget_name, member):
+        member_widget = self.get_settings_widget(widget_name)
         member_widget.member_id = member.id
         member_widget.load_config(member.member_config)
         member_widget.load()
@@ -2786,28 +3094,20 @@ class DynamicMemberConfigWidget(ConfigWidget):
         if plugin_field == '':
             plugin_field = None
 
-        old_widget = getattr(self, widget_name)
-        current_plugin = getattr(old_widget, '_plugin_name', '')
-        is_different = plugin_field != current_plugin
-
-        if is_different:
-            agent_settings_class = class_func(plugin_field)
-            setattr(self, widget_name, agent_settings_class(self.parent))
-            new_widget = getattr(self, widget_name)
-            new_widget.build_schema()
-
-            self.stacked_layout.addWidget(new_widget)
-            self.stacked_layout.setCurrentWidget(new_widget)
-
-            self.stacked_layout.removeWidget(old_widget)
-            old_widget.deleteLater()
+        # keep a widget per plugin, so switching back to a plugin doesn't rebuild its settings
+        widget_key = (widget_name, plugin_field)
+        widget = self.plugin_widgets.get(widget_key)
+        if widget is None:
+            widget = class_func(plugin_field)(self.parent)
+            widget.build_schema()
+            self.stacked_layout.addWidget(widget)
+            self.plugin_widgets[widget_key] = widget
 
-        # getattr(self, widget_name).member_id = member.id
-        # getattr(self, widget_name).load_config(member.member_config)
+        setattr(self, widget_name, widget)
 
     def display_config_for_input(self, line):
         source_member_id, target_member_id = line.source_member_id, line.target_member_id
-        self.stacked_layout.setCurrentWidget(self.input_settings)
+        self.stacked_layout.setCurrentWidget(self.get_settings_widget('input_settings'))
         self.input_settings.input_key = (source_member_id, target_member_id)
         self.input_settings.load_config(line.config)
         self.input_settings.load()
@@ -2874,10 +3174,12 @@ class DynamicMemberConfigWidget(ConfigWidget):
                         )
                     conf['looper'] = True  # todo bug
                     self.parent.inputs_in_view[self.input_key].config = conf
+                    self.parent.invalidate_input_caches()
                     self.widgets[0].looper.setChecked(True)
                     return
 
             self.parent.inputs_in_view[self.input_key].config = conf
+            self.parent.invalidate_input_caches()  # the looper flag decides which inputs count as upstream
             self.parent.save_config()
             # repaint all lines
             graphics_item = self.parent.inputs_in_view[self.input_key]
@@ -1,3 +1,6 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+
 from src.system.apis import APIManager
 from src.system.config import ConfigManager
 from src.system.blocks import BlockManager
@@ -13,6 +16,17 @@ from src.system.venvs import VenvManager
 from src.system.workspaces import WorkspaceManager
 
 
+CONCURRENT_LOAD_TYPES = (
+    APIManager,
+    BlockManager,
+    ConfigManager,
+    RoleManager,
+    ToolManager,
+    VectorDBManager,
+    WorkspaceManager,
+)
+
+
 class SystemManager:
     def __init__(self):
         self.apis = APIManager()
@@ -30,13 +44,77 @@ class SystemManager:
         self.workspaces = WorkspaceManager(parent=self)
 
     def load(self):
-        initial_items = list(self.__dict__.values())  # todo dirty
-        for mgr in initial_items:  # self.__dict__.values():
-            if hasattr(mgr, 'load'):
-                mgr.load()
-        for mgr in self.__dict__.values():
-            if mgr not in initial_items and hasattr(mgr, 'load'):
+        # modules can add managers to this object while loading, so repeat until each one has loaded once
+        loaded = []
+        while True:
+            pending = {
+                name: mgr for name, mgr in self.__dict__.items()
+                if hasattr(mgr, 'load') and all(mgr is not done for done in loaded)
+            }
+            if not pending:
+                break
+            loaded.extend(pending.values())
+            self.load_managers(pending)
+
+    @staticmethod
+    def load_managers(managers):
+        order = sort_load_order(managers)  # before loading anything, so a cycle fails with nothing loaded
+
+        # consecutive managers that only query their own tables load together, overlapping on the sqlite I/O.
+        # the rest import plugins or modules, so they load on this thread, keeping their place in the order
+        batch = []
+        for name in order:
+            mgr = managers[name]
+            is_concurrent = isinstance(mgr, CONCURRENT_LOAD_TYPES)
+            if not is_concurrent or any(dep in batch for dep in getattr(mgr, 'depends_on', ())):
+                load_concurrently([managers[batched] for batched in batch])
+                batch = []
+            if is_concurrent:
+                batch.append(name)
+            else:
                 mgr.load()
+        load_concurrently([managers[batched] for batched in batch])
+
+
+def load_concurrently(managers):
+    if len(managers) < 2:
+        for mgr in managers:
+            mgr.load()
+        return
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(mgr.load) for mgr in managers]
+        for future in futures:
+            future.result()  # re-raise any load error here
+
+
+def sort_load_order(managers):
+    """Order manager names so each loads after the managers named in its `depends_on` (Kahn's algorithm).
+    Otherwise they keep the order they were added in, which is the order they loaded in before `depends_on`"""
+    dependencies = {
+        name: [dep for dep in getattr(mgr, 'depends_on', ()) if dep in managers]
+        for name, mgr in managers.items()
+    }
+    dependents = {name: [] for name in managers}
+    for name, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(name)
+
+    in_degree = {name: len(deps) for name, deps in dependencies.items()}
+    index = {name: i for i, name in enumerate(managers)}
+    ready = [(index[name], name) for name in managers if in_degree[name] == 0]  # already a heap, the indexes ascend
+    order = []
+    while ready:
+        _, name = heapq.heappop(ready)  # the earliest added of the ready managers
+        order.append(name)
+        for dependent in dependents[name]:
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0:
+                heapq.heappush(ready, (index[dependent], dependent))
+
+    if len(order) != len(managers):
+        circular = [name for name in managers if name not in order]
+        raise ValueError(f'Circular manager dependencies: {circular}')
+    return order
 
 
 manager = SystemManager()
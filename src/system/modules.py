@@ -9,6 +9,8 @@ from src.utils.helpers import convert_to_safe_case
 import types
 import importlib.abc
 
+VIRTUAL_MODULES_PREFIX = 'virtual_modules.'
+
 
 class VirtualModuleLoader(importlib.abc.Loader):
     def __init__(self, module_manager, module_id=None):
@@ -34,29 +36,52 @@ class VirtualModuleFinder(importlib.abc.MetaPathFinder):
         self.module_manager = module_manager
 
     def find_spec(self, fullname, path, target=None):
-        parts = fullname.split('.')
-        if parts[0] != 'virtual_modules':
+        # every import in the process comes through here, reject the others before splitting the name
+        if not fullname.startswith(VIRTUAL_MODULES_PREFIX):
             return None
 
-        if len(parts) > 1:
-            folder_path = '.'.join(parts[1:])
+        parts = fullname.split('.')
+        folder_path = fullname[len(VIRTUAL_MODULES_PREFIX):]
 
-            # Check if it's a folder
-            if folder_path in self.module_manager.folder_modules:
-                loader = VirtualModuleLoader(self.module_manager)
-                return importlib.util.spec_from_loader(fullname, loader, is_package=True)
+        # Check if it's a folder
+        if folder_path in self.module_manager.folder_modules:
+            loader = VirtualModuleLoader(self.module_manager)
+            return importlib.util.spec_from_loader(fullname, loader, is_package=True)
 
-            # Check if it's a module
-            parent_folder = '.'.join(parts[1:-1])
-            module_name = parts[-1]
-            module_id = self.module_manager.get_module_id(parent_folder, module_name)
-            if module_id:
-                loader = VirtualModuleLoader(self.module_manager, module_id)
-                return importlib.util.spec_from_loader(fullname, loader)
+        # Check if it's a module
+        parent_folder = '.'.join(parts[1:-1])
+        module_name = parts[-1]
+        module_id = self.module_manager.get_module_id(parent_folder, module_name)
+        if module_id:
+            loader = VirtualModuleLoader(self.module_manager, module_id)
+            return importlib.util.spec_from_loader(fullname, loader)
 
         return None
 
 
+def get_safe_folder_path(folder_id, folder_parents, safe_folder_paths):
+    """Returns the safe case names of the folder and its parents joined with '.', or '' if it doesn't lead to a root folder.
+    folder_parents maps folder_id: (name, parent_id), built paths are added to safe_folder_paths to reuse across calls"""
+    # walk up to a root or an already built folder, then build the paths back down
+    chain = []
+    while folder_id is not None and folder_id not in safe_folder_paths:
+        folder = folder_parents.get(folder_id)
+        if folder is None or folder_id in chain:
+            safe_folder_paths[folder_id] = None
+            break
+        chain.append(folder_id)
+        folder_id = folder[1]
+
+    path = None if folder_id is None else safe_folder_paths[folder_id]
+    is_orphaned = folder_id is not None and path is None
+    for chained_id in reversed(chain):
+        if not is_orphaned:
+            name = convert_to_safe_case(folder_parents[chained_id][0])
+            path = name if path is None else f'{path}.{name}'
+        safe_folder_paths[chained_id] = path
+    return path or ''
+
+
 class ModuleManager:
     def __init__(self, parent):
         self.parent = parent
@@ -66,7 +91,9 @@ class ModuleManager:
         self.loaded_modules = {}
         self.loaded_module_hashes = {}
         self.module_folders = {}
+        self.manager_module_aliases = {}  # module_id: attribute name on the system manager, for modules in a managers folder
         self.folder_modules = {}
+        self.module_index = {}  # (folder_path, module_name): module_id
 
         self.virtual_modules = types.ModuleType('virtual_modules')
         self.virtual_modules.__path__ = []
@@ -75,72 +102,84 @@ class ModuleManager:
 
     def load(self, import_modules=True):
         modules_to_load = []
+        folders = sql.get_results("SELECT id, name, parent_id FROM folders")
         modules_table = sql.get_results("""
-            WITH RECURSIVE folder_path AS (
-                SELECT id, name, parent_id, name AS path
-                FROM folders
-                WHERE parent_id IS NULL
-                
-                UNION ALL
-                
-                SELECT f.id, f.name, f.parent_id, fp.path || '~#~#~#~#~' || f.name
-                FROM folders f
-                JOIN folder_path fp ON f.parent_id = fp.id
-            )
             SELECT
-                m.id,
-                m.name,
-                m.config,
-                m.metadata,
-                COALESCE(fp.path, '') AS folder_path
-            FROM modules m
-            LEFT JOIN folder_path fp ON m.folder_id = fp.id;""")
-        for module_id, name, config, metadata, folder_path in modules_table:  # !420! #
+                id,
+                name,
+                config,
+                metadata,
+                folder_id
+            FROM modules""")
+        folder_parents = {folder_id: (name, parent_id) for folder_id, name, parent_id in folders}
+        safe_folder_paths = {}  # folder_id: safe case dotted path, or None if it doesn't lead to a root folder
+
+        folder_parts = {}  # folder_path: frozenset of its parts, each folder is split once
+        for module_id, name, config, metadata, folder_id in modules_table:  # !420! #
             config = json.loads(config)
             self.modules[module_id] = config
             self.module_names[module_id] = name
             self.module_metadatas[module_id] = json.loads(metadata)
 
-            # convert to safe case all names and rejoin with '.'
-            folder_path = '.'.join([convert_to_safe_case(folder) for folder in folder_path.split('~#~#~#~#~')])
+            # the safe case names of the folders joined with '.'
+            folder_path = get_safe_folder_path(folder_id, folder_parents, safe_folder_paths)
             self.module_folders[module_id] = folder_path
 
-            # Ensure all parent folders are created as modules
-            parts = folder_path.split('.')
-            for i in range(len(parts)):
-                parent_folder = '.'.join(['virtual_modules'] + parts[:i+1])
-                if parent_folder not in sys.modules:
-                    parent_module = types.ModuleType(parent_folder)
-                    parent_module.__path__ = []
-                    parent_module.__package__ = '.'.join(parent_folder.split('.')[:-1])
-                    sys.modules[parent_folder] = parent_module
+            if folder_path not in folder_parts:
+                folder_parts[folder_path] = frozenset(folder_path.split('.'))
+            if 'managers' in folder_parts[folder_path]:
+                self.manager_module_aliases[module_id] = convert_to_safe_case(name)
+            else:
+                self.manager_module_aliases.pop(module_id, None)
 
             if folder_path not in self.folder_modules:
                 self.folder_modules[folder_path] = {}
             self.folder_modules[folder_path][name] = module_id
+            self.module_index[(folder_path, name)] = module_id
 
             auto_load = config.get('load_on_startup', False)
             if module_id not in self.loaded_modules and import_modules and auto_load:
                 # self.load_module(module_id)
                 modules_to_load.append(module_id)
 
-        # do this for now to avoid managing import dependencies
-        load_count = 1
-        while load_count > 0:
-            load_count = 0
-            for module_id in modules_to_load:
+        # Ensure all parent folders are created as modules, once per unique folder package
+        folder_packages = set()
+        for folder_path in folder_parts:
+            parts = folder_path.split('.')
+            for i in range(len(parts)):
+                folder_packages.add('.'.join(['virtual_modules'] + parts[:i+1]))
+        for parent_folder in folder_packages:
+            self.ensure_folder_package(parent_folder)
+
+        # do this for now to avoid managing import dependencies,
+        # retry the modules that failed until a round loads nothing new
+        pending = modules_to_load
+        while pending:
+            next_round = []
+            for module_id in pending:
                 res = self.load_module(module_id)
                 if isinstance(res, Exception):
+                    next_round.append(module_id)
                     continue
-                load_count += 1
-                modules_to_load.remove(module_id)
                 # Check if the module is in the "System modules" folder
-                if 'managers' in self.module_folders[module_id].split('.'):
-                    alias = convert_to_safe_case(self.module_names[module_id])
+                alias = self.manager_module_aliases.get(module_id)
+                if alias:
                     setattr(self.parent, alias, res)
+            if len(next_round) == len(pending):
+                break
+            pending = next_round
+
+    @staticmethod
+    def ensure_folder_package(package_name):
+        """Registers an empty package for a virtual modules folder, unless it's already imported"""
+        if package_name not in sys.modules:
+            package = types.ModuleType(package_name)
+            package.__path__ = []
+            package.__package__ = package_name.rsplit('.', 1)[0]
+            sys.modules[package_name] = package
 
     def get_module_id(self, folder_path, module_name):
-        return self.folder_modules.get(folder_path, {}).get(module_name)
+        return self.module_index.get((folder_path, module_name))
 
     def load_module(self, module_id):
         module_name = self.module_names[module_id]
@@ -149,20 +188,23 @@ class ModuleManager:
         try:
             full_module_name = f'virtual_modules.{folder_path}.{module_name}'
 
-            if full_module_name in sys.modules:
+            # the code is unchanged and it wasn't renamed or moved since it was imported, keep the imported module
+            module_hash = self.module_metadatas[module_id].get('hash')
+            module = self.loaded_modules.get(module_id)
+            if (module_hash is not None
+                    and module is not None
+                    and self.loaded_module_hashes.get(module_id) == module_hash
+                    and module.__name__ == full_module_name):
+                return module
+
+            if module is not None or full_module_name in sys.modules:
                 self.unload_module(module_id)
 
-            # Create parent modules if they don't exist
-            parts = full_module_name.split('.')
-            for i in range(1, len(parts)):
-                parent_module_name = '.'.join(parts[:i])
-                if parent_module_name not in sys.modules:
-                    spec = importlib.util.find_spec(parent_module_name)
-                    if spec is None:
-                        raise ImportError(f"Can't find spec for {parent_module_name}")
-                    parent_module = importlib.util.module_from_spec(spec)
-                    sys.modules[parent_module_name] = parent_module
-                    spec.loader.exec_module(parent_module)
+            # Create parent modules if they don't exist, load normally created them already
+            parent_module_name = 'virtual_modules'
+            for part in folder_path.split('.'):
+                parent_module_name = f'{parent_module_name}.{part}'
+                self.ensure_folder_package(parent_module_name)
 
             # Now import the actual module
             module = importlib.import_module(full_module_name)
@@ -171,7 +213,7 @@ class ModuleManager:
 
             module.__dict__['__package__'] = f'virtual_modules.{folder_path}'
             self.loaded_modules[module_id] = module
-            self.loaded_module_hashes[module_id] = self.module_metadatas[module_id].get('hash')
+            self.loaded_module_hashes[module_id] = module_hash
 
             return module
         except Exception as e:
@@ -1,3 +1,4 @@
+from functools import lru_cache
 
 from src.members.agent import AgentSettings
 from src.members.block import TextBlockSettings, CodeBlockSettings, PromptBlockSettings, TextBlock, CodeBlock, \
@@ -87,6 +88,7 @@ ALL_PLUGINS = {
 }
 
 
+@lru_cache(maxsize=None)  # ALL_PLUGINS is static, so resolved classes never go stale
 def get_plugin_class(plugin_type, plugin_name, default_class=None):
     # if kwargs is None:
     #     kwargs = {}
@@ -101,6 +103,7 @@ def get_plugin_class(plugin_type, plugin_name, default_class=None):
     return clss
 
 
+@lru_cache(maxsize=None)  # reuse the generated class, so plugin switches compare and build the same class
 def get_plugin_agent_settings(plugin_name):
     clss = ALL_PLUGINS['AgentSettings'].get(plugin_name, AgentSettings)
 
@@ -129,6 +132,7 @@ def get_plugin_agent_settings(plugin_name):
     return AgentMemberSettings
 
 
+@lru_cache(maxsize=None)
 def get_plugin_block_settings(plugin_name):
     if not plugin_name:
         plugin_name = 'Text'
@@ -7,6 +7,8 @@ from src.utils.helpers import convert_model_json_to_obj
 
 
 class ProviderManager:
+    depends_on = ('apis',)
+
     def __init__(self, parent):
         self.parent = parent
         self.providers = {}
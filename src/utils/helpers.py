@@ -1,15 +1,18 @@
 import hashlib
 import json
 import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Any, List
 
-from PySide6.QtCore import QSize, Qt
-from PySide6.QtGui import QPixmap, QPainter, QPainterPath, QColor
+from PySide6.QtCore import QSize, Qt, QSignalBlocker
+from PySide6.QtGui import QPixmap, QPainter, QPainterPath, QColor, QPixmapCache
 
 from src.utils import resources_rc
 from src.utils.filesystem import unsimplify_path
 from contextlib import contextmanager
-from PySide6.QtWidgets import QWidget, QMessageBox
+from PySide6.QtWidgets import QWidget, QMessageBox, QGraphicsScene
 import requests
 
 
@@ -42,7 +45,8 @@ def convert_json_to_obj(json_inp):
 
 
 def hash_config(config, exclude=None) -> str:
-    exclude = exclude or []
+    # the serialization must stay as is, these hashes are stored in module metadata and compared on load
+    exclude = frozenset(exclude) if exclude else frozenset()
     hash_config = {k: v for k, v in config.items() if k not in exclude}
     return hashlib.sha1(json.dumps(hash_config).encode()).hexdigest()
 
@@ -65,18 +69,36 @@ def hash_config(config, exclude=None) -> str:
 #     return {k: v for k, v in zip(keys, values)}
 
 
+NETWORK_CHECK_TTL = 10  # seconds a connectivity check result is reused for
+network_check_cache = {'time': None, 'connected': False}
+
+
 def network_connected() -> bool:
+    # retry loops call this once per failed attempt, reuse a recent result instead of probing again
+    last_check_time = network_check_cache['time']
+    if last_check_time is not None and time.monotonic() - last_check_time < NETWORK_CHECK_TTL:
+        return network_check_cache['connected']
+
     try:
-        response = requests.get("https://google.com", timeout=5)
-        return True
+        requests.head("https://google.com", timeout=5)  # headers only, the page body isn't needed
+        connected = True
     except requests.ConnectionError:
-        return False
+        connected = False
+
+    network_check_cache['time'] = time.monotonic()
+    network_check_cache['connected'] = connected
+    return connected
 
 
+SAFE_CASE_TRANSLATION = str.maketrans({' ': '_', '-': '_'})
+SAFE_CASE_PATTERN = re.compile(r'[^a-zA-Z0-9_.]')
+
+
+@lru_cache(maxsize=4096)  # called per folder segment and name, which repeat across modules
 def convert_to_safe_case(text) -> str:
     """Use regex to return only a-z A-Z 0-9 and _"""
-    text = text.replace(' ', '_').replace('-', '_').lower()
-    return re.sub(r'[^a-zA-Z0-9_.]', '_', text)
+    text = text.translate(SAFE_CASE_TRANSLATION).lower()
+    return SAFE_CASE_PATTERN.sub('_', text)
 
 
 def get_avatar_paths_from_config(config, merge_multiple=False) -> Any:
@@ -117,11 +139,19 @@ def get_avatar_paths_from_config(config, merge_multiple=False) -> Any:
         raise NotImplementedError(f'Unknown config type: {config_type}')
 
 
+_END = object()  # sentinel for exhausted iterators in flatten_list
+
+
 def flatten_list(lst) -> List:  # todo dirty
+    # walk the nested lists with a stack of iterators, into a single output list
     flat_list = []
-    for item in lst:
-        if isinstance(item, list):
-            flat_list.extend(flatten_list(item))
+    stack = [iter(lst)]
+    while stack:
+        item = next(stack[-1], _END)
+        if item is _END:
+            stack.pop()
+        elif isinstance(item, list):
+            stack.append(iter(item))
         else:
             flat_list.append(item)
     return flat_list
@@ -187,34 +217,35 @@ async def receive_workflow(
         raise Exception("Pausing nested workflows isn't implemented yet")
 
 
-def params_to_schema(params):
-    type_convs = {
-        'String': str,
-        'Bool': bool,
-        'Int': int,
-        'Float': float,
-    }
-    type_defaults = {
-        'String': '',
-        'Bool': False,
-        'Int': 0,
-        'Float': 0.0,
-    }
+PARAM_TYPE_CONVS = {
+    'String': str,
+    'Bool': bool,
+    'Int': int,
+    'Float': float,
+}
+PARAM_TYPE_DEFAULTS = {
+    'String': '',
+    'Bool': False,
+    'Int': 0,
+    'Float': 0.0,
+}
+PARAM_IGNORE_NAMES = frozenset(['< enter a parameter name >'])
 
-    ignore_names = ['< enter a parameter name >']
+
+def params_to_schema(params):
     schema = [
         {
-            'key': param.get('name', ''),
-            'text': param.get('name', '').capitalize().replace('_', ' '),
-            'type': type_convs.get(param.get('type'), str),
-            'default': param.get('default', type_defaults.get(param.get('type'), '')),
+            'key': name,
+            'text': name.capitalize().replace('_', ' '),
+            'type': PARAM_TYPE_CONVS.get(param.get('type'), str),
+            'default': param.get('default', PARAM_TYPE_DEFAULTS.get(param.get('type'), '')),
             'tooltip': param.get('description', None),
             'minimum': -99999,
             'maximum': 99999,
             'step': 1,
         }
-        for param in params
-        if param.get('name').lower() not in ignore_names
+        for param, name in ((param, param.get('name', '')) for param in params)
+        if name.lower() not in PARAM_IGNORE_NAMES
     ]
     return schema
 
@@ -227,34 +258,42 @@ def try_parse_json(text):
 
 
 def get_all_children(widget):
-    """Recursive function to retrieve all child pages of a given widget."""
-    children = []
-    for child in widget.findChildren(QWidget):
-        children.append(child)
-        children.extend(get_all_children(child))
-    return children
+    """Retrieve all descendant widgets of a given widget."""
+    return widget.findChildren(QWidget)  # already recursive, Qt walks the whole subtree
 
 
 @contextmanager
 def block_signals(*widgets, recurse_children=True):
     """Context manager to block signals for a widget and all its child pages."""
-    all_widgets = []
+    blockers = []
     try:
-        # Get all child pages
+        # Get all child pages, once each even when the given widgets are nested in each other
+        unique_widgets = {}
         for widget in widgets:
-            all_widgets.append(widget)
+            unique_widgets[id(widget)] = widget
             if recurse_children:
-                all_widgets.extend(get_all_children(widget))
+                for child in get_all_children(widget):
+                    unique_widgets.setdefault(id(child), child)
 
         # Block signals
-        for widget in all_widgets:
-            widget.blockSignals(True)
+        blockers = [QSignalBlocker(widget) for widget in unique_widgets.values()]
+
+        yield
+    finally:
+        # Restore each widget's previous state, so nested blocks don't unblock early
+        for blocker in blockers:
+            blocker.unblock()
 
+
+@contextmanager
+def suspend_scene_index(scene):
+    """Context manager to disable a scene's item index during bulk add/remove, so it's only rebuilt once on exit."""
+    old_index_method = scene.itemIndexMethod()
+    try:
+        scene.setItemIndexMethod(QGraphicsScene.NoIndex)
         yield
     finally:
-        # Unblock signals
-        for widget in all_widgets:
-            widget.blockSignals(False)
+        scene.setItemIndexMethod(old_index_method)
 
 
 @contextmanager
@@ -349,16 +388,21 @@ def apply_alpha_to_hex(hex_color, alpha):
 #     return f"{hour_map} {min_map}{timeframe if include_timeframe else ''}"
 
 
+# regex to check if url is a valid url
+URL_PATTERN = re.compile(
+    r"^(?:http|ftp)s?://"
+    r"(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)"
+    r"+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|"
+    r"localhost|"
+    r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})"
+    r"(?::\d+)?"
+    r"(?:/?|[/?]\S+)$",
+    re.IGNORECASE,
+)
+
+
 def is_url_valid(url):
-    # regex to check if url is a valid url
-    regex = r"^(?:http|ftp)s?://" \
-            r"(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)" \
-            r"+(?:[A-Z]{2,6}\.?|[A-Z0-9-]{2,}\.?)|" \
-            r"localhost|" \
-            r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})" \
-            r"(?::\d+)?" \
-            r"(?:/?|[/?]\S+)$"
-    return re.match(regex, url, re.IGNORECASE) is not None
+    return URL_PATTERN.match(url) is not None
 
 
 def split_lang_and_code(text):
@@ -402,7 +446,39 @@ def split_lang_and_code(text):
 #     return matches
 
 
+PIXMAP_CACHE_SIZE = 512
+pixmap_cache = OrderedDict()  # (paths, circular, diameter, opacity, def_avatar, text color): QPixmap, oldest first
+
+
 def path_to_pixmap(paths, circular=True, diameter=30, opacity=1, def_avatar=None):
+    """Same as render_path_to_pixmap, but reuses the rendering when it was made with the same arguments.
+    Each caller gets its own copy, so painting on the returned pixmap doesn't change the cached one"""
+    from src.gui.style import TEXT_COLOR  # the default avatars are colorized with the theme text color
+    paths_key = json.dumps(paths) if isinstance(paths, list) else paths
+    cache_key = (paths_key, circular, diameter, opacity, def_avatar, TEXT_COLOR)
+    pixmap = pixmap_cache.get(cache_key)
+    if pixmap is None:
+        pixmap = render_path_to_pixmap(paths, circular=circular, diameter=diameter, opacity=opacity, def_avatar=def_avatar)
+        pixmap_cache[cache_key] = pixmap
+        if len(pixmap_cache) > PIXMAP_CACHE_SIZE:
+            pixmap_cache.popitem(last=False)
+    else:
+        pixmap_cache.move_to_end(cache_key)
+    return QPixmap(pixmap)  # implicitly shared, the pixel data is only copied if the caller paints on it
+
+
+def load_pixmap(path):
+    """Returns the decoded image at path, shared through QPixmapCache so each file is only decoded once"""
+    cache_key = f'load_pixmap:{path}'
+    pixmap = QPixmapCache.find(cache_key)
+    if pixmap is None or pixmap.isNull():
+        pixmap = QPixmap(path)
+        if not pixmap.isNull():
+            QPixmapCache.insert(cache_key, pixmap)
+    return pixmap
+
+
+def render_path_to_pixmap(paths, circular=True, diameter=30, opacity=1, def_avatar=None):
     if isinstance(paths, list):
         count = len(paths)
         dia_mult = 0.7 if count > 1 else 1  # 1 - (0.08 * min(count - 1, 8))
@@ -448,7 +524,7 @@ def path_to_pixmap(paths, circular=True, diameter=30, opacity=1, def_avatar=None
             path = unsimplify_path(paths)
             if path == '':
                 raise Exception('Empty path')
-            pic = QPixmap(path)
+            pic = load_pixmap(path)
             if path.startswith(':/'):
                 pic = colorize_pixmap(pic)
         except Exception as e:
@@ -263,6 +263,7 @@ class MessageHistory:
                 'member_id': msg.member_id,
                 'content': msg.content,
                 'alt_turn': msg.alt_turn,
+                'log': msg.log,
             } for msg in self.messages
             if (incl_roles == 'all' or msg.role in incl_roles)
             and (base_member_id is None or msg.member_id.startswith(f'{base_member_id}.'))
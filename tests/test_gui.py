@@ -80,6 +80,9 @@ class TestYourApp(unittest.TestCase):
     def setUpClass(cls):
         cls.app = QApplication(sys.argv)
         cls.main = Main()
+        cls.main.show()
+        cls.main.raise_()
+        QTest.qWaitForWindowExposed(cls.main)  # Wait for the window to show, once for all tests
 
     @classmethod
     def tearDownClass(cls):
@@ -88,10 +91,6 @@ class TestYourApp(unittest.TestCase):
         cls.app.quit()
 
     def setUp(self):
-        self.main.show()
-        self.main.raise_()
-        QTest.qWait(1000)  # Wait for the window to show
-
         # self.btn_contexts = self.main.main_menu.settings_sidebar.page_buttons['Contexts']
         # self.btn_agents = self.main.main_menu.settings_sidebar.page_buttons['Agents']
         self.btn_settings = self.main.main_menu.settings_sidebar.page_buttons['Settings']
@@ -116,10 +115,19 @@ class TestYourApp(unittest.TestCase):
         if not btn:
             raise ValueError(f'Page {page_name} not found')
         QTest.mouseClick(btn, Qt.LeftButton)
-        QTest.qWait(500)
+        self.wait_until(page.isVisible)
 
         return page
 
+    @staticmethod
+    def wait_until(predicate, timeout=2000):
+        """Process events until predicate() is true or timeout ms have passed"""
+        deadline = time.monotonic() + timeout / 1000
+        while not predicate():
+            if time.monotonic() > deadline:
+                raise TimeoutError('Timed out waiting for the UI')
+            QTest.qWait(10)
+
     def iterate_button_bar(self, button_bar):
         def do_btn_add(button):
             QTest.mouseClick(button, Qt.LeftButton)
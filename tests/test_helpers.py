@@ -0,0 +1,61 @@
+import unittest
+
+from src.utils.helpers import flatten_list, convert_to_safe_case, is_url_valid
+
+
+class TestFlattenList(unittest.TestCase):
+    def test_nested(self):
+        self.assertEqual(flatten_list([1, [2, [3, [4]]], 'a', [[], 5]]), [1, 2, 3, 4, 'a', 5])
+
+    def test_empty(self):
+        self.assertEqual(flatten_list([]), [])
+        self.assertEqual(flatten_list([[], [[]]]), [])
+
+    def test_flat(self):
+        self.assertEqual(flatten_list([1, 2, 3]), [1, 2, 3])
+
+    def test_tuples_are_kept(self):
+        self.assertEqual(flatten_list([(1, 2), [(3,)]]), [(1, 2), (3,)])
+
+
+class TestSafeCase(unittest.TestCase):
+    def test_spaces_and_dashes(self):
+        self.assertEqual(convert_to_safe_case('My Module-Name'), 'my_module_name')
+
+    def test_other_characters(self):
+        self.assertEqual(convert_to_safe_case('tool (v2)!'), 'tool__v2__')
+
+    def test_dots_are_kept(self):
+        self.assertEqual(convert_to_safe_case('Folder.Sub'), 'folder.sub')
+
+    def test_empty(self):
+        self.assertEqual(convert_to_safe_case(''), '')
+
+
+class TestUrlValid(unittest.TestCase):
+    def test_valid(self):
+        for url in (
+            'http://example.com',
+            'https://sub.example.co.uk/path?q=1',
+            'ftp://files.example.com/file.txt',
+            'http://localhost:8000/',
+            'http://127.0.0.1',
+            'HTTPS://EXAMPLE.COM',
+        ):
+            with self.subTest(url=url):
+                self.assertTrue(is_url_valid(url))
+
+    def test_invalid(self):
+        for url in (
+            '',
+            'example.com',
+            'http://',
+            'mailto:someone@example.com',
+            'https://example.com/with space',
+        ):
+            with self.subTest(url=url):
+                self.assertFalse(is_url_valid(url))
+
+
+if __name__ == '__main__':
+    unittest.main()
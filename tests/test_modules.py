@@ -0,0 +1,50 @@
+import unittest
+
+from src.system.modules import get_safe_folder_path
+
+
+class TestSafeFolderPath(unittest.TestCase):
+    def test_nested_folders(self):
+        folder_parents = {
+            1: ('System Modules', None),
+            2: ('Managers', 1),
+            3: ('my-tools', 2),
+        }
+        safe_folder_paths = {}
+        self.assertEqual(get_safe_folder_path(3, folder_parents, safe_folder_paths), 'system_modules.managers.my_tools')
+        self.assertEqual(safe_folder_paths[2], 'system_modules.managers')
+        self.assertEqual(get_safe_folder_path(2, folder_parents, safe_folder_paths), 'system_modules.managers')
+
+    def test_no_folder(self):
+        self.assertEqual(get_safe_folder_path(None, {}, {}), '')
+
+    def test_orphaned_folder(self):
+        folder_parents = {
+            2: ('Managers', 1),  # folder 1 was deleted
+            3: ('Tools', 2),
+        }
+        safe_folder_paths = {}
+        self.assertEqual(get_safe_folder_path(3, folder_parents, safe_folder_paths), '')
+        self.assertIsNone(safe_folder_paths[2])
+        self.assertEqual(get_safe_folder_path(2, folder_parents, safe_folder_paths), '')
+
+    def test_missing_folder(self):
+        self.assertEqual(get_safe_folder_path(5, {}, {}), '')
+
+    def test_cyclic_folders(self):
+        folder_parents = {
+            1: ('A', 2),
+            2: ('B', 1),
+            3: ('C', 1),
+        }
+        safe_folder_paths = {}
+        self.assertEqual(get_safe_folder_path(3, folder_parents, safe_folder_paths), '')
+        self.assertEqual(get_safe_folder_path(1, folder_parents, safe_folder_paths), '')
+        self.assertEqual(get_safe_folder_path(2, folder_parents, safe_folder_paths), '')
+
+    def test_self_parent(self):
+        self.assertEqual(get_safe_folder_path(1, {1: ('A', 1)}, {}), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
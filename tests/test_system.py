@@ -0,0 +1,130 @@
+import threading
+import unittest
+
+from src.system.base import SystemManager, sort_load_order
+from src.system.roles import RoleManager
+
+
+class StubManager:
+    def __init__(self, name, loaded, depends_on=()):
+        self.name = name
+        self.loaded = loaded
+        self.depends_on = depends_on
+
+    def load(self):
+        self.loaded.append(self.name)
+
+
+class StubConcurrentManager(StubManager, RoleManager):
+    """A manager of a type that load_managers loads in its thread pool"""
+    def load(self):
+        self.loaded.append((self.name, threading.current_thread() is not threading.main_thread()))
+
+
+class TestLoadOrder(unittest.TestCase):
+    def stub_managers(self, dependencies):
+        loaded = []
+        managers = {name: StubManager(name, loaded, deps) for name, deps in dependencies.items()}
+        return managers, loaded
+
+    def test_dependencies_load_first(self):
+        managers, _ = self.stub_managers({
+            'tools': ('providers', 'apis'),
+            'providers': ('apis',),
+            'apis': (),
+            'roles': (),
+        })
+        order = sort_load_order(managers)
+
+        self.assertCountEqual(order, managers)
+        self.assertLess(order.index('apis'), order.index('providers'))
+        self.assertLess(order.index('providers'), order.index('tools'))
+
+    def test_keeps_the_added_order_when_unconstrained(self):
+        managers, _ = self.stub_managers({
+            'apis': (),
+            'providers': ('apis',),
+            'plugins': (),
+            'modules': (),
+        })
+        self.assertEqual(sort_load_order(managers), ['apis', 'providers', 'plugins', 'modules'])
+
+    def test_missing_dependency_is_ignored(self):
+        managers, _ = self.stub_managers({
+            'providers': ('apis',),
+            'roles': (),
+        })
+        self.assertCountEqual(sort_load_order(managers), ['providers', 'roles'])
+
+    def test_managers_without_depends_on(self):
+        managers = {'apis': object(), 'roles': object()}
+        self.assertEqual(sort_load_order(managers), ['apis', 'roles'])
+
+    def test_cycle_raises(self):
+        managers, _ = self.stub_managers({
+            'a': ('b',),
+            'b': ('a',),
+            'c': (),
+        })
+        with self.assertRaises(ValueError) as context:
+            sort_load_order(managers)
+        self.assertIn("'a'", str(context.exception))
+        self.assertIn("'b'", str(context.exception))
+        self.assertNotIn("'c'", str(context.exception))
+
+    def test_load_managers_loads_each_once_in_order(self):
+        managers, loaded = self.stub_managers({
+            'tools': ('providers',),
+            'providers': ('apis',),
+            'apis': (),
+        })
+        SystemManager.load_managers(managers)
+        self.assertEqual(loaded, ['apis', 'providers', 'tools'])
+
+    def test_load_managers_with_cycle_loads_nothing(self):
+        managers, loaded = self.stub_managers({
+            'a': ('b',),
+            'b': ('a',),
+        })
+        with self.assertRaises(ValueError):
+            SystemManager.load_managers(managers)
+        self.assertEqual(loaded, [])
+
+    def test_load_managers_with_cycle_loads_no_concurrent_managers(self):
+        managers, loaded = self.stub_managers({
+            'a': ('b',),
+            'b': ('a',),
+        })
+        managers['apis'] = StubConcurrentManager('apis', loaded)
+        managers['roles'] = StubConcurrentManager('roles', loaded)
+        with self.assertRaises(ValueError):
+            SystemManager.load_managers(managers)
+        self.assertEqual(loaded, [])
+
+    def test_load_managers_concurrent_managers_keep_their_place(self):
+        loaded = []
+        managers = {
+            'apis': StubConcurrentManager('apis', loaded),
+            'blocks': StubConcurrentManager('blocks', loaded),
+            'providers': StubManager('providers', loaded, depends_on=('apis',)),
+            'modules': StubManager('modules', loaded),
+            'roles': StubConcurrentManager('roles', loaded),
+        }
+        SystemManager.load_managers(managers)
+        self.assertCountEqual(loaded[:2], [('apis', True), ('blocks', True)])
+        self.assertEqual(loaded[2:], ['providers', 'modules', ('roles', False)])
+
+    def test_load_managers_concurrent_dependency_loads_first(self):
+        loaded = []
+        managers = {
+            'apis': StubConcurrentManager('apis', loaded),
+            'blocks': StubConcurrentManager('blocks', loaded),
+            'tools': StubConcurrentManager('tools', loaded, depends_on=('apis',)),
+        }
+        SystemManager.load_managers(managers)
+        self.assertCountEqual(loaded[:2], [('apis', True), ('blocks', True)])
+        self.assertEqual(loaded[2], ('tools', False))
+
+
+if __name__ == '__main__':
+    unittest.main()
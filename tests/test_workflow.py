@@ -0,0 +1,108 @@
+import json
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from PySide6.QtCore import QPointF, QTimer
+from PySide6.QtWidgets import QApplication, QWidget
+from src.members.workflow import ConnectionLine, WorkflowSettings
+
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+class TestConnectionLine(unittest.TestCase):
+    def setUp(self):
+        source_member = SimpleNamespace(id='1', output_point=QPointF(0, 0))
+        target_member = SimpleNamespace(id='2', input_point=QPointF(200, 100))
+        self.line = ConnectionLine(None, source_member, target_member)
+
+    def test_editing_mappings_repaints_the_line(self):
+        path_key = self.line.path_key
+        self.line.config = {'mappings.data': [{'source': 'Output', 'target': 'Param'}]}
+
+        with patch.object(self.line, 'update') as update:
+            self.line.updatePosition()
+
+        self.assertIs(self.line.path_key, path_key)
+        update.assert_called_once()
+
+    def test_moving_a_member_rebuilds_the_path(self):
+        path_key = self.line.path_key
+        self.line.end_point = QPointF(300, 100)
+
+        with patch.object(self.line, 'update') as update:
+            self.line.updatePosition()
+
+        self.assertNotEqual(self.line.path_key, path_key)
+        update.assert_not_called()  # setPath already repaints it
+        self.assertEqual(self.line.path().pointAtPercent(1), QPointF(302, 102))
+
+
+class StubConfigFields:
+    def __init__(self):
+        self.config = {}
+
+    def load_config(self, json_config=None):
+        self.config = dict(json_config or {})
+
+    def get_config(self):
+        return dict(self.config)
+
+
+class StubWorkflowSettings(WorkflowSettings):
+    """Only the state that loading and saving a config touches, without the scene and its widgets"""
+    def __init__(self, parent):
+        QWidget.__init__(self)
+        self.parent = parent
+        self.table_name = 'entities'
+        self.config = {}
+        self.members_in_view = {}
+        self.inputs_in_view = {}
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(150)
+        self.save_timer.timeout.connect(self.save_config)
+        self.queued_save_entity_id = None
+        self.workflow_config = StubConfigFields()
+        self.workflow_params = StubConfigFields()
+        self.workflow_buttons = SimpleNamespace(autorun=True, show_hidden_bubbles=False, show_nested_bubbles=False)
+        self.member_config_widget = SimpleNamespace(load=lambda temp_only_config=False: None)
+
+    def load_async_groups(self):
+        pass
+
+
+class TestWorkflowSettingsSave(unittest.TestCase):
+    def setUp(self):
+        self.parent = SimpleNamespace(selected_item_id=None)
+        self.parent.get_selected_item_id = lambda: self.parent.selected_item_id
+        self.settings = StubWorkflowSettings(self.parent)
+
+    def entity_config(self, name):
+        return {'_TYPE': 'workflow', 'members': [], 'inputs': [], 'config': {'name': name}, 'params': []}
+
+    def test_queued_save_is_written_to_its_own_entity(self):
+        self.parent.selected_item_id = 1
+        self.settings.load_config(self.entity_config('A'))
+
+        with patch('src.members.workflow.sql.execute') as execute:
+            self.settings.queue_save_config()  # e.g. a member of A was dragged
+
+            # selecting B in the tree loads its config before the queued save runs
+            self.parent.selected_item_id = 2
+            self.settings.load_config(self.entity_config('B'))
+            self.settings.load_config(self.entity_config('B'))  # nothing is queued now, so B is never written
+
+        self.assertFalse(self.settings.save_timer.isActive())
+        execute.assert_called_once()
+        (query, (json_config, entity_id)), _ = execute.call_args
+        self.assertIn('UPDATE entities', query)
+        self.assertEqual(entity_id, 1)
+        self.assertEqual(json.loads(json_config)['config']['name'], 'A')
+        self.assertEqual(self.settings.workflow_config.config['name'], 'B')
+
+
+if __name__ == '__main__':
+    unittest.main()